@@ -1,29 +1,47 @@
-from ..api.llm_client import OpenRouterClient
+from ..api.openrouter_llm_client import OpenRouterClient
 
-class ClaimAnalyzer:
-    def __init__(self):
-        self.llm_client = OpenRouterClient()
+# Built once at import; only the two claim blobs vary per call. The static
+# prefix is marked with cache_control so OpenRouter can serve it from the
+# provider-side prompt cache on repeat comparisons.
+_SYSTEM_PREFIX = """
+        Compare these patent claims and identify key changes.
 
-    def analyze_claim_changes(self, original_claims: str, amended_claims: str) -> dict:
-        prompt = f"""
-        Compare these patent claims and identify key changes:
-        
-        Original Claims:
-        {original_claims}
-        
-        Amended Claims:
-        {amended_claims}
-        
         Please identify:
         1. Added limitations
         2. Removed elements
         3. Scope changes
         4. Potential estoppel issues
         """
-        
-        analysis = self.llm_client.analyze_text(prompt)
+
+_USER_TMPL = """
+        Original Claims:
+        {orig}
+
+        Amended Claims:
+        {amend}
+        """
+
+class ClaimAnalyzer:
+    def __init__(self):
+        self.llm_client = OpenRouterClient()
+
+    def analyze_claim_changes(self, original_claims: str, amended_claims: str) -> dict:
+        system_prefix = _SYSTEM_PREFIX
+        user_body = _USER_TMPL.format(orig=original_claims, amend=amended_claims)
+
+        messages = [
+            {
+                "role": "system",
+                "content": [
+                    {"type": "text", "text": system_prefix, "cache_control": {"type": "ephemeral"}}
+                ]
+            },
+            {"role": "user", "content": user_body}
+        ]
+
+        analysis = self.llm_client.analyze_text(messages)
         return {
             "analysis": analysis,
             "original_claims": original_claims,
             "amended_claims": amended_claims
-        }
\ No newline at end of file
+        }
@@ -1,80 +1,212 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
 import base64
-import json
+import diskcache
+import httpx
+import random
+import threading
 import time
 import xmltodict
 from typing import Tuple, Dict, Any
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 import os
 
+# Parse .env once at import; __init__ runs per request in the FastAPI routes
+# and shouldn't re-stat and re-parse the file each time.
+load_dotenv()
+
+# Parsed OPS payloads are near-immutable for a given publication, so repeat
+# queries can be served from disk instead of paying HTTPS + XML parse again.
+_OPS_CACHE = diskcache.Cache(os.path.join(os.getcwd(), ".epo_cache"), size_limit=2**30)
+_DAY = 86400
+_TTL_BY_ENDPOINT = {
+    "published-data": 30 * _DAY,  # biblio essentially never changes
+    "legal": _DAY,                # legal events do get appended
+    "family": 7 * _DAY
+}
+
+# OAuth token shared across EPOClient instances. The FastAPI routes build a
+# fresh client per request, so per-instance state would refresh on every hit;
+# the token is valid for ~20 minutes and safe to reuse process-wide.
+_TOKEN_CACHE = {"token": None, "expiry": 0.0}
+_TOKEN_LOCK = threading.Lock()
+
 class EPOClient:
     def __init__(self):
-        load_dotenv()
         self.consumer_key = os.getenv('EPO_CONSUMER_KEY')
         self.consumer_secret = os.getenv('EPO_CONSUMER_SECRET')
         self.token_url = "https://ops.epo.org/3.2/auth/accesstoken"
         self.base_url = "https://ops.epo.org/3.2/rest-services"
-        self.access_token = None
-        self.token_expiry = None
+        # Credentials are static for the life of the client; encode once
+        credentials = f"{self.consumer_key}:{self.consumer_secret}"
+        self._basic_auth = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        # Reuse one pooled session so repeated OPS calls skip the TCP/TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            # 429/503 are rate-limit responses handled explicitly in call_ops_api
+            # so the Retry-After header is honored; the adapter only covers the
+            # remaining transient server errors.
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.aclient = None  # created lazily so sync-only use never opens it
+
+    def _get_aclient(self) -> httpx.AsyncClient:
+        if self.aclient is None:
+            # HTTP/2 lets the three gathered OPS calls share one TLS connection
+            self.aclient = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=httpx.Timeout(30.0)
+            )
+        return self.aclient
+
+    @property
+    def access_token(self):
+        return _TOKEN_CACHE["token"]
+
+    @property
+    def token_expiry(self):
+        return _TOKEN_CACHE["expiry"]
 
     def get_access_token(self) -> Tuple[str, float]:
         """Get an access token from EPO OPS."""
-        credentials = f"{self.consumer_key}:{self.consumer_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
-
         headers = {
-            "Authorization": f"Basic {encoded_credentials}",
+            "Authorization": self._basic_auth,
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
         data = {"grant_type": "client_credentials"}
-        response = requests.post(self.token_url, headers=headers, data=data)
+        response = self.session.post(self.token_url, headers=headers, data=data)
 
         if response.status_code != 200:
             raise Exception(f"EPO OPS Auth Error: {response.status_code}, {response.text}")
 
-        token_response = json.loads(response.text)
-        self.access_token = token_response["access_token"]
+        token_response = response.json()
         expires_in = int(token_response["expires_in"])
-        self.token_expiry = time.time() + expires_in - 60  # Renew 1 min before expiry
+        _TOKEN_CACHE["token"] = token_response["access_token"]
+        _TOKEN_CACHE["expiry"] = time.time() + expires_in - 60  # Renew 1 min before expiry
 
-        return self.access_token, self.token_expiry
+        return _TOKEN_CACHE["token"], _TOKEN_CACHE["expiry"]
 
     def ensure_valid_token(self) -> str:
         """Ensure we have a valid token, refresh if necessary."""
-        if not self.access_token or not self.token_expiry or time.time() >= self.token_expiry:
-            self.get_access_token()
-        return self.access_token
+        # Lock so concurrent handlers don't stampede the token endpoint
+        with _TOKEN_LOCK:
+            if not _TOKEN_CACHE["token"] or time.time() >= _TOKEN_CACHE["expiry"]:
+                self.get_access_token()
+            return _TOKEN_CACHE["token"]
+
+    @staticmethod
+    def _retry_delay(retry_after: str, attempt: int) -> float:
+        """Backoff for a rate-limited response: honor Retry-After when the
+        server sends one, else exponential with a little jitter."""
+        if retry_after and retry_after.isdigit():
+            base = int(retry_after)
+        else:
+            base = min(60, 2 ** attempt)
+        return base + random.uniform(0, 0.5)
 
-    def call_ops_api(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
+    @staticmethod
+    def _cache_key(endpoint: str, params: Dict = None) -> str:
+        return f"{endpoint}?{urlencode(params or {})}"
+
+    @staticmethod
+    def _cache_ttl(endpoint: str) -> int:
+        return _TTL_BY_ENDPOINT.get(endpoint.split("/")[0], _DAY)
+
+    def call_ops_api(self, endpoint: str, params: Dict = None, refresh: bool = False) -> Dict[str, Any]:
         """Make a call to the EPO OPS API."""
+        key = self._cache_key(endpoint, params)
+        if not refresh:
+            hit = _OPS_CACHE.get(key)
+            if hit is not None:
+                return hit
+
         token = self.ensure_valid_token()
         headers = {
             "Authorization": f"Bearer {token}",
-            "Accept": "application/xml"
+            "Accept": "application/xml",
+            "Accept-Encoding": "gzip, deflate"
         }
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=headers, params=params)
+        for attempt in range(6):
+            # stream=True lets expat read straight off the socket instead of
+            # buffering the whole (compressed) payload in memory first
+            response = self.session.get(url, headers=headers, params=params, stream=True)
+            if response.status_code in (429, 503):
+                delay = self._retry_delay(response.headers.get("Retry-After"), attempt)
+                print(f"Rate limit hit — waiting {delay:.1f}s before retry...")
+                response.close()
+                time.sleep(delay)
+                continue
+            break
+
+        if response.status_code != 200:
+            raise Exception(f"EPO OPS Request Error: {response.status_code}, {response.text}")
 
-        if response.status_code == 429:
-            print("Rate limit hit — waiting before retry...")
-            time.sleep(5)
-            return self.call_ops_api(endpoint, params)
+        response.raw.decode_content = True  # transparently gunzip while streaming
+        parsed = xmltodict.parse(response.raw)
+        # store the parsed dict so cache hits skip the XML parse as well
+        _OPS_CACHE.set(key, parsed, expire=self._cache_ttl(endpoint))
+        return parsed
+
+    async def _call_ops_api_async(self, endpoint: str, params: Dict = None, refresh: bool = False) -> Dict[str, Any]:
+        """Async counterpart of call_ops_api on a shared httpx.AsyncClient."""
+        key = self._cache_key(endpoint, params)
+        if not refresh:
+            hit = _OPS_CACHE.get(key)
+            if hit is not None:
+                return hit
+
+        token = self.ensure_valid_token()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/xml"
+        }
+        url = f"{self.base_url}/{endpoint}"
+        client = self._get_aclient()
+        for attempt in range(6):
+            response = await client.get(url, headers=headers, params=params)
+            if response.status_code in (429, 503):
+                delay = self._retry_delay(response.headers.get("Retry-After"), attempt)
+                print(f"Rate limit hit — waiting {delay:.1f}s before retry...")
+                await asyncio.sleep(delay)
+                continue
+            break
 
         if response.status_code != 200:
             raise Exception(f"EPO OPS Request Error: {response.status_code}, {response.text}")
 
-        return xmltodict.parse(response.text)
+        # xmltodict is pure-Python CPU work; push it to a worker thread so the
+        # event loop keeps serving other requests while large payloads parse
+        parsed = await asyncio.to_thread(xmltodict.parse, response.content)
+        _OPS_CACHE.set(key, parsed, expire=self._cache_ttl(endpoint))
+        return parsed
 
-    def get_patent_data(self, pub_number: str) -> Dict[str, Any]:
+    def get_patent_data(self, pub_number: str, refresh: bool = False) -> Dict[str, Any]:
         """Get comprehensive patent data including biblio, legal, and family data."""
         data = {
-            "bibliographic": self.call_ops_api(f"published-data/publication/epodoc/{pub_number}/biblio"),
-            "legal": self.call_ops_api(f"legal/publication/epodoc/{pub_number}"),
-            "family": self.call_ops_api(f"family/publication/epodoc/{pub_number}")
+            "bibliographic": self.call_ops_api(f"published-data/publication/epodoc/{pub_number}/biblio", refresh=refresh),
+            "legal": self.call_ops_api(f"legal/publication/epodoc/{pub_number}", refresh=refresh),
+            "family": self.call_ops_api(f"family/publication/epodoc/{pub_number}", refresh=refresh)
         }
         return data
 
+    async def get_patent_data_async(self, pub_number: str, refresh: bool = False) -> Dict[str, Any]:
+        """Same as get_patent_data but fetches the three OPS endpoints concurrently."""
+        biblio, legal, family = await asyncio.gather(
+            self._call_ops_api_async(f"published-data/publication/epodoc/{pub_number}/biblio", refresh=refresh),
+            self._call_ops_api_async(f"legal/publication/epodoc/{pub_number}", refresh=refresh),
+            self._call_ops_api_async(f"family/publication/epodoc/{pub_number}", refresh=refresh)
+        )
+        return {"bibliographic": biblio, "legal": legal, "family": family}
+
     def get_full_text(self, pub_number: str) -> Dict[str, Any]:
         """Get full text of the patent document if available."""
         return self.call_ops_api(f"published-data/publication/epodoc/{pub_number}/fulltext")
\ No newline at end of file
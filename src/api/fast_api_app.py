@@ -1,10 +1,32 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import time
+from functools import lru_cache
+from typing import List
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from api.epo_client import EPOClient
+from api.openrouter_llm_client import OpenRouterClient
 
 app = FastAPI(title="Patent History Analyzer")
 
+# Single shared instances so the connection pools, token cache and prompt
+# cache survive across requests instead of being rebuilt per hit.
+@lru_cache
+def get_epo_client() -> EPOClient:
+    return EPOClient()
+
+@lru_cache
+def get_openrouter_client() -> OpenRouterClient:
+    return OpenRouterClient()
+
+class PatentBatchRequest(BaseModel):
+    publication_numbers: List[str]
+
+class AnalyzeRequest(BaseModel):
+    prompt: str
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -14,15 +36,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def _token_refresher(client: EPOClient):
+    """Refresh the EPO OAuth token shortly before expiry so no foreground
+    request ever pays the token round trip."""
+    while True:
+        try:
+            if client.token_expiry - time.time() <= 120:
+                await asyncio.to_thread(client.get_access_token)
+        except Exception as e:
+            print(f"Background token refresh failed: {e}")
+            await asyncio.sleep(30)
+            continue
+        await asyncio.sleep(max(1.0, client.token_expiry - time.time() - 120))
+
+@app.on_event("startup")
+async def start_token_refresher():
+    asyncio.create_task(_token_refresher(get_epo_client()))
+
 @app.get("/")
 async def root():
     return {"message": "Patent History Analyzer API"}
 
 @app.get("/patent/{publication_number}")
-async def get_patent_info(publication_number: str):
+async def get_patent_info(publication_number: str, refresh: bool = False, client: EPOClient = Depends(get_epo_client)):
     try:
-        client = EPOClient()
-        data = client.get_patent_data(publication_number)
+        data = await client.get_patent_data_async(publication_number, refresh=refresh)
         return JSONResponse(content=data)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/patents")
+async def get_patents_info(batch: PatentBatchRequest, client: EPOClient = Depends(get_epo_client)):
+    """Batch lookup: fetch several publications concurrently over one client.
+    The semaphore keeps us inside OPS fair-use limits."""
+    sem = asyncio.Semaphore(8)
+
+    async def one(pub_number: str):
+        async with sem:
+            return await client.get_patent_data_async(pub_number)
+
+    results = await asyncio.gather(
+        *(one(pn) for pn in batch.publication_numbers),
+        return_exceptions=True
+    )
+
+    out = {}
+    for pn, result in zip(batch.publication_numbers, results):
+        if isinstance(result, Exception):
+            out[pn] = {"error": str(result), "retryable": "429" in str(result)}
+        else:
+            out[pn] = result
+    return JSONResponse(content=out)
+
+@app.post("/analyze/stream")
+async def analyze_stream(req: AnalyzeRequest, client: OpenRouterClient = Depends(get_openrouter_client)):
+    """Stream LLM analysis back as server-sent text chunks."""
+    return StreamingResponse(client.stream_analyze(req.prompt), media_type="text/event-stream")
\ No newline at end of file
@@ -1,10 +1,16 @@
 import os
-import requests
+import hashlib
+import httpx
+import orjson
+from typing import Iterator
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
+# One .env parse at import instead of per client construction
+load_dotenv()
+
 class OpenRouterClient:
     def __init__(self):
-        load_dotenv()
         self.api_key = os.getenv('OPENROUTER_API_KEY')
         self.base_url = 'https://openrouter.ai/api/v1'
         self.headers = {
@@ -12,19 +18,101 @@ class OpenRouterClient:
             "HTTP-Referer": os.getenv('APP_URL', 'http://localhost:3000'),
             "Content-Type": "application/json"
         }
+        # One pooled HTTP/2 client: concurrent completions multiplex over a
+        # single TLS connection instead of opening one socket each
+        transport = httpx.HTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+        self.session = httpx.Client(
+            transport=transport,
+            timeout=httpx.Timeout(30.0),
+            headers=self.headers
+        )
+        # In-memory memoization for deterministic prompts (LRU eviction + 1h TTL)
+        self.cache = TTLCache(maxsize=1024, ttl=3600)
+        self.stats = {"hits": 0, "misses": 0}
+        # usage block of the last completion (provider cache hit/creation token counts)
+        self.last_usage = {}
+
+    @staticmethod
+    def _cache_key(payload: dict) -> str:
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def analyze_text(self, prompt, use_cache: bool = True) -> str:
+        """Run a completion. `prompt` is either a plain string or a structured
+        messages list (used to mark cache_control breakpoints for provider-side
+        prompt caching)."""
+        if isinstance(prompt, str):
+            messages = [{"role": "user", "content": prompt}]
+        else:
+            messages = prompt
+        payload = {
+            "model": "deepseek-v3",
+            "messages": messages,
+            # temperature 0 when caching so repeat prompts are reproducible
+            "temperature": 0.0 if use_cache else 0.2
+        }
+        if use_cache:
+            key = self._cache_key(payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
 
-    def analyze_text(self, prompt: str) -> str:
         try:
-            response = requests.post(
+            # orjson serializes/parses several times faster than stdlib json
+            # and the session already carries the JSON Content-Type header
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek-v3",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.2
-                }
+                content=orjson.dumps(payload)
             )
             response.raise_for_status()
-            return response.json()['choices'][0]['message']['content']
-        except requests.exceptions.RequestException as e:
+            body = orjson.loads(response.content)
+            usage = body.get('usage') or {}
+            self.last_usage = {
+                "cache_creation_input_tokens": usage.get("cache_creation_input_tokens", 0),
+                "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0)
+            }
+            content = body['choices'][0]['message']['content']
+        except httpx.HTTPError as e:
+            raise Exception(f"OpenRouter API request failed: {str(e)}")
+
+        if use_cache:
+            self.cache[key] = content
+        return content
+
+    def stream_analyze(self, prompt) -> Iterator[str]:
+        """Stream completion text chunks as they arrive instead of blocking on
+        the full response; first token lands in a few hundred ms."""
+        if isinstance(prompt, str):
+            messages = [{"role": "user", "content": prompt}]
+        else:
+            messages = prompt
+        payload = {
+            "model": "deepseek-v3",
+            "messages": messages,
+            "temperature": 0.2,
+            "stream": True
+        }
+        try:
+            with self.session.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                content=orjson.dumps(payload)
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data.strip() == "[DONE]":
+                        break
+                    chunk = orjson.loads(data)
+                    delta = chunk['choices'][0].get('delta', {}).get('content', '')
+                    if delta:
+                        yield delta
+        except httpx.HTTPError as e:
             raise Exception(f"OpenRouter API request failed: {str(e)}")
\ No newline at end of file
@@ -1,8 +1,17 @@
+import gzip
 import os
 import streamlit as st
+import asyncio
+import hashlib
 import json
+import orjson
 import re
+import threading
+import time
 import requests
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from jose import jwt  
 from api.epo_client import EPOClient
 from datetime import datetime
@@ -10,13 +19,17 @@ from data.parsers.claims_extractor import ClaimsParser
 from data.parsers.claims_analysis import ClaimAnalyzer
 from prosecution_history_estoppel import ProsecutionHistoryEstoppel
 from prior_art_correlator import PriorArtCorrelator
-from visualization import build_event_timeline, build_claim_evolution
-from reporting import build_html_report, export_pdf_from_html
 from dateutil.parser import parse as date_parse 
 from ops_fetcher import get_raw
+try:
+    # optional C parser for ISO 8601 timestamps; used ahead of dateutil's
+    # fuzzy parser when installed
+    import ciso8601
+except ImportError:
+    ciso8601 = None
 from ops_extractor import to_extract
 from report_prompt import build_prompts
-from report_guardrails import require_json_tokens, drop_uncited_sentences, prepend_coverage_header, sanitize_ep_language
+from report_guardrails import require_json_tokens, finalize_json_text, prepend_coverage_header
 
 
 API_BASE = os.getenv("API_BASE", "http://localhost:8000/api")
@@ -35,6 +48,37 @@ def get_user_id_from_token(token: str) -> int:
     return int(payload.get("sub", 0)) if payload else 0
 
 
+# Compiled once at import; these patterns run for every legal event, so the
+# per-call re-cache lookup and hashing adds up on large families
+_RE_YMD8 = re.compile(r'\d{8}')
+_RE_EFFECTIVE = re.compile(r'Effective\s+DATE\s+(\d{8})', re.IGNORECASE)
+_RE_PATENT_PREFIX = re.compile(r'EP \d+[A-Z]\s+\d{4}-\d{2}-\d{2}[A-Z]+\s+')
+_RE_LEGAL_CLEAN = re.compile(r'REFERENCE TO A NATIONAL CODE\s+|Ref\s+')
+_RE_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_RE_TOKEN = re.compile(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]')
+_RE_TOKEN_END = re.compile(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]$')
+_RE_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_RE_DMY_INLINE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
+_RE_TOP_EVENT_LINE = re.compile(r'^(.*?) – (.*?) – (.*?) – \[(EVT#\d+)\]$')
+_RE_EVT_TOKEN = re.compile(r'\[(EVT#\d+)\]')
+_RE_CIT_TOKEN = re.compile(r'\[(CIT#\d+)\]')
+_RE_CIT_TOKEN_END = re.compile(r'\[(CIT#\d+)\]$')
+_RE_RANKED_CIT_ID = re.compile(r'^\d+\.\s+([^\s–]+)')
+_RE_RANKED_RISK = re.compile(r'–\s+(novelty|obviousness|screening[^–]*)')
+_RE_H1_CLOSE = re.compile(r'</h1>')
+_RE_COVERAGE_DUP_STRONG = re.compile(
+    r'<p[^>]*><strong>Coverage:</strong>.*?</p>(?:\s*<p[^>]*><strong>Coverage:</strong>.*?</p>)+'
+)
+_RE_COVERAGE_DUP = re.compile(r'<p[^>]*>Coverage:.*?</p>\s*<p[^>]*>Coverage:.*?</p>')
+_RE_H2_HEADERS = {
+    h: re.compile(rf'<h2[^>]*>{re.escape(h)}</h2>')
+    for h in ("Executive Summary", "Timeline Analysis", "Prior Art Analysis", "Evidence-Linked Recommendations")
+}
+
+# match_to_rejections reports confidence as strings; rank them numerically so
+# comparisons/sorts don't happen lexicographically ("low" > "high")
+_CONFIDENCE_RANK = {"high": 2, "medium": 1, "low": 0}
+
 EVENT_CODE_MAPPING = {
     "17P": {"desc": "examination request filed", "effects": ["examination_requested"]},
     "INTG": {"desc": "intention to grant announced", "effects": ["grant_intended"]},
@@ -70,8 +114,7 @@ def normalize_event(event: dict) -> dict:
 
 # Add after imports, before other functions
 def _split_sentences(text: str) -> list:
-    import re
-    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+    return [s.strip() for s in _RE_SENT_SPLIT.split(text.strip()) if s.strip()]
 
 
 def inject_coverage_header(html_text: str, coverage: dict) -> str:
@@ -150,9 +193,9 @@ def remove_placeholders_and_normalize(text: str) -> str:
             continue
         
         # Normalize any dates in the line to ISO
-        line = re.sub(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', 
-                      lambda m: f"{m.group(3)}-{m.group(2):0>2}-{m.group(1):0>2}",
-                      line)
+        line = _RE_DMY_INLINE.sub(
+            lambda m: f"{m.group(3)}-{m.group(2):0>2}-{m.group(1):0>2}",
+            line)
         
         lines.append(line)
     
@@ -166,9 +209,7 @@ def render_to_html(text: str) -> str:
     return html_escape(text).replace("\n", "<br>")
 
 def finalize_section(section_name: str, text: str, extract: dict) -> str:
-    text = enforce_json_citations(text)
-    text = drop_uncited_sentences(text)
-    text = sanitize_ep_language(text, jurisdiction="EP")
+    text = finalize_json_text(text, jurisdiction="EP")
     if section_name == "timeline_analysis":
         text = text + "\n\nTop 3 pivotal events:\n" + render_top_pivotal_events(extract.get("events", []))
     if section_name == "prior_art_analysis":
@@ -180,105 +221,95 @@ def finalize_section(section_name: str, text: str, extract: dict) -> str:
         text = text + "\n\nRanked Top 5:\n" + render_ranked_citations(citations)
     return text
 
+_RE_PUB_COMPONENTS = re.compile(r'^(EP)?(\d+)([A-Z]\d*)?$')
+
+# Kind codes probed when the caller didn't supply one
+_KIND_CODES = ("A1", "A2", "A", "B1", "B2")
+
+# Bullet separator shared by clean_legal_text and the legal-events tab
+_BULLET_SEP = "\n• "
+
+# Deletion table for stripping ASCII whitespace in one C-level pass
+_WS_TABLE = str.maketrans("", "", " \t\n\r\f\v")
+
 def generate_pub_variants(pub: str):
     """Return ordered list of publication-number variants to try against EPO OPS."""
-    s = pub.strip().upper()
-    # remove spaces
-    s = re.sub(r"\s+", "", s)
+    # strip all whitespace without spinning up the regex engine; translate
+    # with a deletion table is a single pass with no intermediate list
+    s = pub.upper().translate(_WS_TABLE)
     variants = []
-    
-    # Extract components using regex
-    m = re.match(r'^(EP)?(\d+)([A-Z]\d*)?$', s)
+
+    # Extract components using the precompiled pattern
+    m = _RE_PUB_COMPONENTS.match(s)
     if m:
         prefix, number, kind = m.groups()
         prefix = prefix or "EP"  # Default to EP if no prefix
-        
+
         # Base number without leading zeros
         base = f"{prefix}{number}"
-        
+
         # Add leading zeros to make 7 digits for older patents (up to ~2.1M)
         # or 8 digits for newer patents (3M+)
         if len(number) <= 7:
             padded = f"{prefix}{number.zfill(7)}"
         else:
             padded = f"{prefix}{number.zfill(8)}"
-            
-        # Add variants with and without padding
+
+        # Add variants with and without padding, then each candidate kind
+        # code. The old dotted forms (EP123.A1) collapsed to the undotted
+        # ones once the API normalization stripped dots, so they are not
+        # generated at all any more.
         variants.extend([base, padded])
-        
-        # If kind code provided, add variants with it
-        if kind:
-            variants.extend([
-                f"{base}{kind}",
-                f"{padded}{kind}",
-                f"{base}.{kind}",
-                f"{padded}.{kind}"
-            ])
-        else:
-            # Try common kind codes
-            for k in ["A1", "A2", "A", "B1", "B2"]:
-                variants.extend([
-                    f"{base}{k}",
-                    f"{padded}{k}",
-                    f"{base}.{k}",
-                    f"{padded}.{k}"
-                ])
-    
-    # Ensure proper epodoc format for API
+        for k in ((kind,) if kind else _KIND_CODES):
+            variants.extend([f"{base}{k}", f"{padded}{k}"])
+
+    # Emit the epodoc form (no EP prefix) alongside each variant
     epodoc_variants = []
     for v in variants:
-        # Remove dots and spaces
-        v = re.sub(r'[\.\s]', '', v)
-        # Format as epodoc if not already
         if v.startswith('EP'):
-            epodoc_variants.append(v[2:])  # Remove EP prefix for epodoc format
+            epodoc_variants.append(v[2:])
         epodoc_variants.append(v)
-    
-    # De-dupe while preserving order
-    seen = set()
-    return [x for x in epodoc_variants if x not in seen and not seen.add(x)]
+
+    # De-dupe while preserving order; every duplicate that survives here
+    # costs a full HTTPS probe in main()
+    return list(dict.fromkeys(epodoc_variants))
 
 def enforce_token_citations(text: str, valid_tokens: set = None) -> str:
     """Append [MISSING] to sentences lacking a valid bracketed token (EVT#, CIT#, CLM#, DSG#)."""
     if valid_tokens is None:
         valid_tokens = set()
-    import re
     out = []
-    for s in re.split(r'(?<=[.!?])\s+', text.strip()):
+    for s in _RE_SENT_SPLIT.split(text.strip()):
         if not s:
             continue
         # Check if sentence ends with a valid token like [EVT#1], [CIT#2], etc.
-        if re.search(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', s):
-            # Extract the token
-            m = re.search(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', s)
-            if m:
-                token = m.group(1)
-                if not valid_tokens or token in valid_tokens:
-                    out.append(s)
-                    continue
+        m = _RE_TOKEN.search(s)
+        if m:
+            token = m.group(1)
+            if not valid_tokens or token in valid_tokens:
+                out.append(s)
+                continue
         # No valid token found, append [MISSING]
         out.append(s + " [MISSING]")
     return " ".join(out)
 
 def drop_uncited_sentences(text: str) -> str:
     """Remove sentences ending with [MISSING]."""
-    import re
     keep = []
-    for s in re.split(r'(?<=[.!?])\s+', text.strip()):
+    for s in _RE_SENT_SPLIT.split(text.strip()):
         if s and not s.endswith("[MISSING]"):
             keep.append(s)
     return " ".join(keep)
 
 def validate_tokens(text: str, token_index: dict) -> str:
     """Ensure every token used in text exists in token_index; mark invalid tokens with [MISSING]."""
-    import re
     valid_tokens = set(token_index.keys())
     out = []
-    for s in re.split(r'(?<=[.!?])\s+', text.strip()):
+    for s in _RE_SENT_SPLIT.split(text.strip()):
         if not s:
             continue
         # Find all tokens in this sentence
-        tokens_in_s = re.findall(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', s)
+        tokens_in_s = _RE_TOKEN.findall(s)
         # Check if all are valid
         if tokens_in_s and all(t in valid_tokens for t in tokens_in_s):
             out.append(s)
@@ -295,6 +326,36 @@ def sanitize_ep_language(text: str, jurisdiction: str = "EP") -> str:
         return text.replace("estoppel", "prosecution interpretation")
     return text
 
+def _finalize_text(text: str, valid_tokens: set, jurisdiction: str = "EP") -> str:
+    """Single-pass guardrail over LLM section text.
+
+    Fuses enforce_token_citations -> validate_tokens -> drop_uncited_sentences
+    -> sanitize_ep_language -> remove_placeholders_and_normalize into one
+    sentence walk: split once, keep only sentences carrying valid tokens,
+    apply the EP wording and inline date fixes, join once. The individual
+    helpers remain for callers that need a single rule in isolation.
+    """
+    if not text:
+        return ""
+    out = []
+    for s in _RE_SENT_SPLIT.split(text.strip()):
+        if not s or "(Omitted pending source)" in s:
+            continue
+        tokens_in_s = _RE_TOKEN.findall(s)
+        if not tokens_in_s:
+            # uncited: previously tagged [MISSING] and then dropped
+            continue
+        if valid_tokens and any(t not in valid_tokens for t in tokens_in_s):
+            # unknown reference: previously tagged [INVALID_...] and dropped
+            continue
+        if jurisdiction == "EP":
+            s = s.replace("estoppel", "prosecution interpretation")
+        s = _RE_DMY_INLINE.sub(
+            lambda m: f"{m.group(3)}-{m.group(2):0>2}-{m.group(1):0>2}",
+            s)
+        out.append(s)
+    return " ".join(out)
+
 def render_top_pivotal_events(events: list) -> str:
     """Render top 3 events with tokens [EVT#k] and mapped effect descriptions (shown earliest->latest)."""
     if not events:
@@ -329,23 +390,28 @@ def render_top_pivotal_events(events: list) -> str:
     
     if not top:
         return ""
-    
+
+    # O(1) token lookup instead of rescanning the full event list per row;
+    # setdefault keeps the first (lowest) index when (code, date) repeats,
+    # matching what the old next(...) scan returned
+    idx_by_code_date = {}
+    for i, ev in enumerate(events, 1):
+        idx_by_code_date.setdefault((ev.get("code"), ev.get("date")), i)
+
     lines = []
     for idx, e in enumerate(top, 1):
         date = e.get("date", "YYYY-MM-DD")
         code = e.get("code", "?")
         effects = e.get("effects", [])
-        # Map effects to readable description
+        # Map effects to readable description; the mapped description depends
+        # only on the code, so resolve it once rather than per effect
+        mapped_desc = EVENT_CODE_MAPPING.get(code, {}).get("desc")
         effect_descs = []
         for eff in effects:
-            mapped_desc = EVENT_CODE_MAPPING.get(code, {}).get("desc") if code in EVENT_CODE_MAPPING else None
-            if mapped_desc:
-                effect_descs.append(mapped_desc)
-            else:
-                effect_descs.append(eff.replace("_", " "))
+            effect_descs.append(mapped_desc if mapped_desc else eff.replace("_", " "))
         effect_str = "; ".join(effect_descs) if effect_descs else "event recorded"
         # find stable token index in original events ordering (match on date+code)
-        token_idx = next((i+1 for i, ev in enumerate(events) if ev.get("code") == code and ev.get("date") == date), idx)
+        token_idx = idx_by_code_date.get((code, date), idx)
         token = f"EVT#{token_idx}"
         lines.append(f"{date} – {code} – {effect_str} – [{token}]")
     
@@ -356,7 +422,243 @@ def format_date(date_str):
     iso = normalize_date_to_iso(date_str)
     return iso if iso else "N/A"
 
-def extract_structured_data(data):
+_RE_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$', re.MULTILINE)
+
+def _build_combined_prompt(section_prompts: dict) -> tuple:
+    """Marshal the independent report-section prompts into one request asking
+    for a JSON object keyed by section, so one round trip replaces four.
+    Returns (system, user): the instruction header and static task bodies stay
+    byte-identical across patents so providers can cache the prefix, while the
+    per-patent fact blocks travel in the user message."""
+    keys = ", ".join(f'"{k}"' for k in section_prompts)
+    header = (
+        "Complete the following independent analysis tasks in one pass. "
+        f"Return a single JSON object with exactly these keys: {keys}. "
+        "Each value must be the plain-text answer for that task, bullets "
+        "separated by newlines. Return only the JSON object."
+    )
+    static = "\n\n".join(f"--- Task: {key} ---\n{sys_p}" for key, (sys_p, _) in section_prompts.items())
+    dynamic = "\n\n".join(f"--- Facts for {key} ---\n{user_p}" for key, (_, user_p) in section_prompts.items())
+    return header + "\n\n" + static, dynamic
+
+def _cap_events(event_items: list, max_n: int = 40) -> tuple:
+    """Cap the event token list fed into prompts. Long-lived patents log
+    hundreds of routine events that inflate prompt tokens (and so latency and
+    cost); keep every legally significant code plus the most recent ones up to
+    max_n. Returns (kept_items, truncated_flag) preserving input order."""
+    if len(event_items) <= max_n:
+        return event_items, False
+    kept = [(tok, meta) for tok, meta in event_items
+            if (meta.get("code") or "").upper() in EVENT_CODE_MAPPING][:max_n]
+    kept_toks = {tok for tok, _ in kept}
+    remaining = max_n - len(kept)
+    if remaining > 0:
+        rest = [(tok, meta) for tok, meta in event_items if tok not in kept_toks]
+        rest.sort(key=lambda it: it[1].get("date") or "", reverse=True)
+        kept_toks.update(tok for tok, _ in rest[:remaining])
+    return [it for it in event_items if it[0] in kept_toks], True
+
+def _is_llm_failure(text: str) -> bool:
+    """query_llm reports errors by returning sentinel strings instead of
+    raising; those must never be remembered as section answers or one
+    transient API error would be replayed for the rest of the session."""
+    return text.startswith("Analysis failed:") or text.startswith("LLM analysis not available")
+
+def _query_with_timeout(pac, user_p: str, system_p: str = None, timeout: float = 30.0, retries: int = 2) -> str:
+    """Bound a blocking query_llm call. API latency is heavy-tailed; without a
+    cap one hung call blocks the whole rerun and the download button never
+    renders. Stragglers are retried with exponential backoff."""
+    for attempt in range(retries + 1):
+        ex = ThreadPoolExecutor(max_workers=1)
+        fut = ex.submit(pac.query_llm, user_p, system_p)
+        try:
+            return fut.result(timeout=timeout)
+        except FuturesTimeoutError:
+            pass
+        finally:
+            # don't wait for a hung call; the leaked worker dies with the request
+            ex.shutdown(wait=False, cancel_futures=True)
+        time.sleep(0.5 * 2 ** attempt)
+    return ""
+
+# Report section prompt templates. Hoisted to module scope so the four
+# multi-kilobyte literals are built once at import instead of on every
+# Streamlit rerun of the report branch.
+_PROMPT_TEMPLATES = {
+                                "executive_summary": """Executive Summary — Draft as a briefing for senior legal counsel on enforceability, litigation potential, monetization, key risks, and next steps.
+
+                            Write exactly 5 concise, expert bullets. Each bullet must:
+                            - State the fact or event clearly,
+                            - Explain its legal significance or impact (risk/opportunity),
+                            - Provide a practical next step (concrete and actionable),
+                            - End the sentence with exactly one evidence token (e.g., [EVT#1] or [CIT#1]).
+
+                            Examples:
+                            - "No opposition was filed post‑grant, reducing post‑grant risk in designated states. [EVT#3]"
+                            - "The patent lapsed in GB for non‑payment, suspending enforcement unless reinstated. [EVT#4]"
+                            - "The closest reference currently appears screening‑only pending claim mapping. [CIT#1]"
+                            - "Commission a targeted invalidity search focusing on the closest reference. [CIT#1]"
+
+                            Use only tokens from token_index. End every sentence with exactly one token.
+                            If no token applies, write "(Omitted pending source)".
+                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
+
+                                "timeline_analysis": """Timeline Analysis — Summarize the 5 most legally significant prosecution events and their impact on litigation.
+
+                            Write exactly 5 concise, professional bullets. Each bullet must:
+                            - Explain how the event affects enforceability, claim scope, or risk,
+                            - Give a concrete next step for counsel,
+                            - End the sentence with exactly one evidence token.
+
+                            Example:
+                            - "Intention to grant with no recorded opposition indicates an allowable claim set absent new art. [EVT#2]"
+
+                            Use only tokens from token_index. End every sentence with exactly one token.
+                            If no token applies, write "(Omitted pending source)".
+                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
+
+                                "prior_art_analysis": """Prior Art Analysis — Provide 5 concise, cited bullets on the most relevant references, covering risk type (novelty, obviousness, screening), likely claims affected, and next steps.
+
+                            Write exactly 5 bullets. Each bullet must:
+                            - Identify the citation and risk,
+                            - State which claim(s) are most likely affected (or say if mapping needed),
+                            - Recommend a concrete next step (mapping, expert review, targeted search),
+                            - End with exactly one token.
+
+                            Use only tokens from token_index. End every sentence with exactly one token.
+                            If no token applies, write "(Omitted pending source)".
+                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
+
+                                "recommendations": """Evidence‑Linked Recommendations — Provide exactly 3 specific, actionable next steps (evidence preservation, invalidity search, national status checks, licensing).
+
+                            Each recommendation must be one sentence and end with exactly one evidence token.
+
+                            Examples:
+                            - "Confirm reinstatement feasibility and current national status for the GB lapse event. [EVT#4]"
+                            - "Commission a focused invalidity search centered on the closest citation. [CIT#1]"
+                            - "Review designated states at the time of intention to grant to scope licensing opportunities. [EVT#2]"
+
+                            Use only tokens from token_index. End every sentence with exactly one token.
+                            If no token applies, write "(Omitted pending source)".
+                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel"."""
+}
+
+@st.cache_resource(show_spinner=False)
+def _get_epo_client():
+    """One EPOClient per process — keeps its OAuth token and HTTP session
+    alive across reruns instead of re-authenticating on every cache miss."""
+    return EPOClient()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _fetch_patent(pub: str):
+    """Cached OPS fetch — Streamlit reruns the whole script on every widget
+    interaction, so repeat lookups of the same number must not re-hit OPS."""
+    return _get_epo_client().get_patent_data(pub)
+
+@st.cache_resource(show_spinner=False)
+def _get_claim_analyzer():
+    """One ClaimAnalyzer (and its LLM client) for the whole session instead
+    of a new instance per rerun of the claims tab."""
+    return ClaimAnalyzer(openrouter_api_key=os.getenv("OPENROUTER_API_KEY"))
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _full_data_json(pub: str, _data: dict) -> bytes:
+    """Serialized Full Data payload keyed by publication number; without the
+    cache the whole analysis dict is re-serialized on every rerun just to
+    feed the download button. The session dict travels in the unhashed
+    `_data` argument so a cache miss re-serializes what was actually
+    analyzed instead of re-fetching from OPS."""
+    return orjson.dumps(_data, option=orjson.OPT_INDENT_2)
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _full_data_json_gz(pub: str, _data: dict) -> bytes:
+    """Gzipped variant of the Full Data payload; JSON with its repeated OPS
+    keys compresses 5-10x, and level 1 costs almost no CPU."""
+    return gzip.compress(_full_data_json(pub, _data), compresslevel=1)
+
+def _dig(d, *path, default=None):
+    """Walk a nested dict/list along `path`, returning `default` on any miss.
+    One try block instead of a chain of .get({}, {}) allocations per hop."""
+    try:
+        for k in path:
+            d = d[k]
+        return d
+    except (KeyError, IndexError, TypeError):
+        return default
+
+
+def _iter_legal_events(data):
+    """Walk the legal-status family tree once, yielding each ops:legal event
+    with its pre-extracted free text and stable (member, event) indices.
+    Shared by extract_structured_data and extract_events_for_viz so the nested
+    structure is only traversed a single time per consumer."""
+    legal_data = _dig(data, "legal", "ops:world-patent-data", "ops:patent-family", default={})
+    members = legal_data.get("ops:family-member") if isinstance(legal_data, dict) else None
+    if not members:
+        return
+    # OPS collapses single-member families to a bare dict; normalize to a list
+    # so every consumer sees the same shape
+    if isinstance(members, dict):
+        members = [members]
+    for m_idx, member in enumerate(members):
+        events = member.get("ops:legal", [])
+        if isinstance(events, dict):
+            events = [events]
+        for e_idx, event in enumerate(events):
+            if not isinstance(event, dict):
+                continue
+            pre = event.get("ops:pre")
+            pre_text = pre.get("#text", "") if isinstance(pre, dict) else ""
+            yield m_idx, e_idx, event, pre_text
+
+
+_EFFECTS_MAP = {
+    "17P": ["examination_requested"],
+    "INTG": ["grant_intended"],
+    "26N": ["no_opposition"],
+    "GBPC": ["lapse_national"]
+}
+
+
+def _viz_event(m_idx, e_idx, event, pre_text):
+    """Build the visualization dict for one ops:legal event, or None if it
+    carries no usable date."""
+    # Prefer explicit effective date in text, else @date / @dateMigr
+    effective_match = _RE_EFFECTIVE.search(pre_text)
+    date_str = effective_match.group(1) if effective_match else (event.get("@date") or event.get("@dateMigr") or "")
+    if not date_str:
+        return None
+    # Normalize YYYYMMDD if present
+    try:
+        s = str(date_str)
+        if isinstance(date_str, int) or _RE_YMD8.fullmatch(s):
+            # Known fixed layout: plain integer slicing skips strptime's
+            # format-string interpretation on the hot path
+            dt = datetime(int(s[:4]), int(s[4:6]), int(s[6:8]))
+        else:
+            # Separated forms (2002-06-05 etc.) go through the same cheap
+            # scanner as normalize_date_to_iso; only oddballs hit dateutil
+            ymd = _scan_ymd(s)
+            dt = datetime(*ymd) if ymd is not None else date_parse(s, fuzzy=True)
+    except Exception:
+        return None
+    if dt.year < 1900 or dt.year > datetime.now().year + 1:
+        return None
+    code = event.get("@code", "") or ""
+    effects = _EFFECTS_MAP.get(code, ["unknown"])
+    # Stable JSON path to this ops:legal node (member index + event index)
+    path = f"/ops:world-patent-data/ops:patent-family/ops:family-member[{m_idx}]/ops:legal[{e_idx}]"
+    return {
+        "date": dt.strftime("%Y-%m-%d"),
+        "code": code,
+        "desc": event.get("@desc", "") or "",
+        "text": clean_legal_text(event.get("ops:pre", {})),
+        "effects": effects,
+        "path": path
+    }
+
+
+def extract_structured_data(data, correlator=None):
     """Extract structured data for LLM and visualization."""
     structured_data = {
         "bibliographic": {},
@@ -377,106 +679,133 @@ def extract_structured_data(data):
         "publication_number": data.get("bibliographic", {}).get("publication_number", "")
     }
 
-    # Extract legal status events
-    legal_data = data.get("legal", {}).get("ops:world-patent-data", {}).get("ops:patent-family", {})
-    if "ops:family-member" in legal_data:
-        for member in legal_data["ops:family-member"]:
-            for event in member.get("ops:legal", []):
-                if isinstance(event, dict):
-                    date_str = event.get("@date") or event.get("@effective-date")
-                    if date_str:
-                        structured_data["legal_status"].append({
-                            "date": date_str,
-                            "code": event.get("@code", ""),
-                            "desc": event.get("@desc", ""),
-                            "text": event.get("ops:pre", {}).get("#text", "") if isinstance(event.get("ops:pre"), dict) else ""
-                        })
+    # Single pass over the legal events: fill both the LLM-facing legal_status
+    # list and the DSS visualization events without re-walking the tree
+    viz_events = []
+    for m_idx, e_idx, event, pre_text in _iter_legal_events(data):
+        date_str = event.get("@date") or event.get("@effective-date")
+        if date_str:
+            structured_data["legal_status"].append({
+                "date": date_str,
+                "code": event.get("@code", ""),
+                "desc": event.get("@desc", ""),
+                "text": pre_text
+            })
+        viz = _viz_event(m_idx, e_idx, event, pre_text)
+        if viz is not None:
+            viz_events.append(viz)
 
     # Extract claims
     claims = ClaimsParser.extract_claims(data)
     structured_data["claims"] = claims
 
-    # Extract prior art
-    pac = PriorArtCorrelator(data)
+    # Extract prior art — reuse the caller's correlator so its disk cache
+    # and memoized match results aren't rebuilt for a second instance
+    pac = correlator or PriorArtCorrelator(data)
     structured_data["prior_art"] = pac.extract_citations()
 
     # Extract family data (if applicable)
     structured_data["family"] = data.get("family", {})
 
     # Extract DSS data
-    structured_data["dss"]["events"] = extract_events_for_viz(data)
+    structured_data["dss"]["events"] = sorted(viz_events, key=itemgetter("date", "code"))
     structured_data["dss"]["claims"] = pac.get_claim_versions()
 
     return structured_data
 
 
-def normalize_date_to_iso(raw) -> str:
-    """Return ISO date 'YYYY-MM-DD' or None if cannot normalize or out-of-range."""
-    if not raw:
+_DATE_SEPS = set("-/. ")
+
+def _scan_ymd(s: str):
+    """Single left-to-right pass over a short digit/separator string,
+    returning (year, month, day) or None. Covers the dominant OPS shapes
+    (YYYYMMDD, YYYY-MM-DD, DD-MM-YYYY and the / variants) without regex
+    or strptime; anything else falls through to the slower parsers."""
+    if len(s) > 10:
         return None
+    runs = []
+    val = width = 0
+    for ch in s:
+        if ch.isdigit():
+            val = val * 10 + (ord(ch) - 48)
+            width += 1
+        elif ch in _DATE_SEPS:
+            if width:
+                runs.append((val, width))
+                val = width = 0
+        else:
+            return None
+    if width:
+        runs.append((val, width))
+    if len(runs) == 1 and runs[0][1] == 8:
+        v = runs[0][0]
+        return v // 10000, (v // 100) % 100, v % 100
+    if len(runs) == 3:
+        if runs[0][1] == 4:
+            return runs[0][0], runs[1][0], runs[2][0]
+        if runs[2][1] == 4:
+            return runs[2][0], runs[1][0], runs[0][0]
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _normalize_date_to_iso_cached(s: str):
+    """Cached worker for normalize_date_to_iso; a family's events repeat the
+    same handful of date strings dozens of times."""
     now_year = datetime.now().year
-    s = str(raw).strip()
     # quick digits like 20020605 or 2002-06-05 or 2002/06/05 etc.
     try:
-        # Prefer strict YYYYMMDD
-        if re.fullmatch(r'\d{8}', s):
-            dt = datetime.strptime(s, "%Y%m%d")
+        ymd = _scan_ymd(s)
+        if ymd is not None:
+            dt = datetime(*ymd)
         else:
-            # use dateutil for most other formats (robust)
-            dt = date_parse(s, fuzzy=True)
+            # EPO OPS dates nearly always arrive in one of these shapes;
+            # strptime on a known format is an order of magnitude cheaper
+            # than dateutil's fuzzy tokenizer
+            dt = None
+            for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d-%m-%Y", "%d/%m/%Y", "%Y"):
+                try:
+                    dt = datetime.strptime(s, fmt)
+                    break
+                except ValueError:
+                    continue
+            if dt is None and ciso8601 is not None:
+                # ISO-shaped timestamps (e.g. 2002-06-05T00:00:00Z) parse in C
+                try:
+                    dt = ciso8601.parse_datetime(s)
+                except ValueError:
+                    dt = None
+            if dt is None:
+                # use dateutil for most other formats (robust)
+                dt = date_parse(s, fuzzy=True)
         if dt.year < 1900 or dt.year > now_year + 1:
             return None
         return dt.strftime("%Y-%m-%d")
     except Exception:
         return None
 
+def normalize_date_to_iso(raw) -> str:
+    """Return ISO date 'YYYY-MM-DD' or None if cannot normalize or out-of-range."""
+    if not raw:
+        return None
+    if isinstance(raw, datetime):
+        # already parsed — don't round-trip through str() and the parsers
+        if raw.year < 1900 or raw.year > datetime.now().year + 1:
+            return None
+        return raw.strftime("%Y-%m-%d")
+    return _normalize_date_to_iso_cached(str(raw).strip())
+
 def extract_events_for_viz(data):
     """Extract events with properly formatted dates for visualization and attach stable JSON paths and effects."""
     events = []
-    legal_data = data.get("legal", {}).get("ops:world-patent-data", {}).get("ops:patent-family", {})
-    effects_map = {
-        "17P": ["examination_requested"],
-        "INTG": ["grant_intended"],
-        "26N": ["no_opposition"],
-        "GBPC": ["lapse_national"]
-    }
-    
-    if "ops:family-member" in legal_data:
-        for m_idx, member in enumerate(legal_data["ops:family-member"]):
-            if "ops:legal" in member:
-                for e_idx, event in enumerate(member["ops:legal"]):
-                    if not isinstance(event, dict):
-                        continue
-                    # Prefer explicit effective date in text, else @date / @dateMigr
-                    details = event.get("ops:pre", {}).get("#text", "") if isinstance(event.get("ops:pre"), dict) else ""
-                    effective_match = re.search(r'Effective\s+DATE\s+(\d{8})', details, re.IGNORECASE)
-                    date_str = effective_match.group(1) if effective_match else (event.get("@date") or event.get("@dateMigr") or "")
-                    if not date_str:
-                        continue
-                    # Normalize YYYYMMDD if present
-                    try:
-                        if isinstance(date_str, int) or re.fullmatch(r'\d{8}', str(date_str)):
-                            dt = datetime.strptime(str(date_str), "%Y%m%d")
-                        else:
-                            dt = date_parse(str(date_str), fuzzy=True)
-                    except Exception:
-                        continue
-                    if dt.year < 1900 or dt.year > datetime.now().year + 1:
-                        continue
-                    code = event.get("@code", "") or ""
-                    effects = effects_map.get(code, ["unknown"])
-                    # Stable JSON path to this ops:legal node (member index + event index)
-                    path = f"/ops:world-patent-data/ops:patent-family/ops:family-member[{m_idx}]/ops:legal[{e_idx}]"
-                    events.append({
-                        "date": dt.strftime("%Y-%m-%d"),
-                        "code": code,
-                        "desc": event.get("@desc", "") or "",
-                        "text": clean_legal_text(event.get("ops:pre", {})),
-                        "effects": effects,
-                        "path": path
-                    })
+    for m_idx, e_idx, event, pre_text in _iter_legal_events(data):
+        viz = _viz_event(m_idx, e_idx, event, pre_text)
+        if viz is not None:
+            events.append(viz)
     # sort by date asc for timeline visual; tie-breaker code
-    return sorted(events, key=lambda x: (x["date"], x.get("code", "")))
+    # (_viz_event always sets both keys, so itemgetter is safe and skips a
+    # Python-level lambda frame per element)
+    return sorted(events, key=itemgetter("date", "code"))
 
 def build_token_index(extract: dict) -> dict:
     """Build a token_index mapping short tokens (EVT#k, CIT#k, etc.) to metadata with paths."""
@@ -524,8 +853,12 @@ def build_token_index(extract: dict) -> dict:
 
 def display_bibliographic_data(data):
     try:
-        doc = data["bibliographic"]["ops:world-patent-data"]["exchange-documents"]["exchange-document"][0]
-        
+        doc = _dig(data, "bibliographic", "ops:world-patent-data", "exchange-documents", "exchange-document", 0)
+        if doc is None:
+            raise KeyError("exchange-document")
+        # Pull the nested block once; every section below reads from it
+        bib_data = doc.get("bibliographic-data", {})
+
         # Basic Information
         st.markdown("#### Basic Information")
         col1, col2 = st.columns(2)
@@ -539,17 +872,17 @@ def display_bibliographic_data(data):
             st.write(doc["abstract"].get("p", "No abstract available"))
         
         # Title Information
-        if "invention-title" in doc.get("bibliographic-data", {}):
+        if "invention-title" in bib_data:
             st.markdown("#### Invention Title")
-            for title in doc["bibliographic-data"]["invention-title"]:
+            for title in bib_data["invention-title"]:
                 if "#text" in title:
                     lang = title.get("@lang", "").upper()
                     st.write(f"**{lang}:** {title['#text']}")
-        
+
         # Classifications
-        if "classification-ipc" in doc.get("bibliographic-data", {}):
+        if "classification-ipc" in bib_data:
             st.markdown("#### IPC Classifications")
-            ipc_texts = doc["bibliographic-data"]["classification-ipc"].get("text", [])
+            ipc_texts = bib_data["classification-ipc"].get("text", [])
             for ipc in ipc_texts:
                 st.write(f"- {ipc}")
 
@@ -566,12 +899,15 @@ def clean_legal_text(text):
                 # Extract just the #text value, ignore @line
                 item_text = item.get('#text', '')
                 if item_text:
-                    # Remove redundant patent number and code prefixes
-                    item_text = re.sub(r'EP \d+[A-Z]\s+\d{4}-\d{2}-\d{2}[A-Z]+\s+', '', item_text)
+                    # Remove redundant patent number and code prefixes; the
+                    # cheap substring check skips the regex engine entirely for
+                    # the common case of lines without the prefix
+                    if 'EP' in item_text[:16]:
+                        item_text = _RE_PATENT_PREFIX.sub('', item_text, count=1)
                     cleaned.append(item_text)
             else:
                 cleaned.append(str(item))
-        return "\n• " + "\n• ".join(cleaned)
+        return _BULLET_SEP + _BULLET_SEP.join(cleaned)
     
     if isinstance(text, dict):
         # Handle single dictionary
@@ -580,23 +916,35 @@ def clean_legal_text(text):
     # Handle plain string
     return str(text)
 
-def display_prior_art(data):
+def display_prior_art(data, correlator=None):
     try:
         st.markdown("### Prior Art Analysis")
-        correlator = PriorArtCorrelator(data)
+        # Reuse the correlator built at analyze time; rebuilding re-reads the
+        # disk cache and re-extracts citations on every tab click
+        correlator = correlator or st.session_state.get("prior_art_correlator") or PriorArtCorrelator(data)
         results = correlator.match_to_rejections()
 
         if not results:
             st.info("No citations found in the data.")
             return
 
+        # One pass over results for every count used below; the old
+        # list comprehensions re-scanned the list four times (twice over,
+        # counting the Statistical Overview) and built throwaway lists
+        n_biblio = n_legal = n_high = 0
+        for r in results:
+            source = r.get("source")
+            n_biblio += source == "bibliographic"
+            n_legal += source == "legal"
+            n_high += r.get("confidence") == "high"
+
         # Generate executive summary using OpenRouter
         summary_prompt = f"""Analyze these patent citations and provide a brief executive summary:
         Total Citations: {len(results)}
-        Bibliographic Citations: {len([r for r in results if r.get('source') == 'bibliographic'])}
-        Legal Citations: {len([r for r in results if r.get('source') == 'legal'])}
-        High Confidence Matches: {len([r for r in results if r.get('confidence') == 'high'])}
-        
+        Bibliographic Citations: {n_biblio}
+        Legal Citations: {n_legal}
+        High Confidence Matches: {n_high}
+
         Provide a 2-3 sentence summary focusing on the significance of these citations.
         """
         
@@ -618,12 +966,9 @@ def display_prior_art(data):
         with col1:
             st.metric("Total Citations", len(results))
         with col2:
-            high_conf = len([r for r in results if r.get("confidence") == "high"])
-            st.metric("High Confidence", f"{high_conf}/{len(results)}")
+            st.metric("High Confidence", f"{n_high}/{len(results)}")
         with col3:
-            biblio = len([r for r in results if r.get("source") == "bibliographic"])
-            legal = len([r for r in results if r.get("source") == "legal"])
-            st.metric("Sources", f"Biblio: {biblio} | Legal: {legal}")
+            st.metric("Sources", f"Biblio: {n_biblio} | Legal: {n_legal}")
 
         # Citation Details with improved formatting
         st.markdown("#### Citation Analysis")
@@ -646,22 +991,28 @@ def display_prior_art(data):
                     - **Events**: {len(matches)}
                     """)
                 
-                # Event Timeline
+                # Event Timeline — join all event divs into one markdown call;
+                # each st.markdown is a separate ForwardMsg to the browser, so
+                # one frame per expander beats one per event
                 if matches:
-                    st.markdown("---")
-                    st.markdown("**Event Timeline**")
+                    divs = []
                     for match in matches:
                         code = match.get("code", "")
                         desc = match.get("desc", "")
-                        text = match.get("text", "")
-                        
-                        # Create a clean event display
-                        st.markdown(f"""
+                        # preview is precomputed by the correlator; slice only
+                        # for cached results written before the field existed
+                        preview = match.get("text_preview")
+                        if preview is None:
+                            text = match.get("text", "")
+                            preview = (text[:200] + "...") if len(text) > 200 else text
+                        divs.append(f"""
                         <div style='padding: 10px; margin: 5px 0; border-radius: 5px;'>
                             <p><strong>{code}</strong> - {desc}</p>
-                            <p style='font-size: 0.9em; margin-top: 5px;'>{text[:200]}{'...' if len(text) > 200 else ''}</p>
+                            <p style='font-size: 0.9em; margin-top: 5px;'>{preview}</p>
                         </div>
-                        """, unsafe_allow_html=True)
+                        """)
+                    st.markdown("---")
+                    st.markdown("**Event Timeline**\n" + "".join(divs), unsafe_allow_html=True)
                 
                 # Optional AI Analysis for low confidence matches
                 if confidence.lower() == "low":
@@ -674,70 +1025,96 @@ def display_prior_art(data):
     except Exception as e:
         st.error(f"Prior art rendering failed: {e}")
 
-def display_legal_events(data):
+def _legal_display_rows(data):
+    """Precompute the legal-events tab's display strings once per document.
+    Title-casing, date formatting and detail cleaning don't change between
+    reruns, so they shouldn't be repeated on every widget interaction."""
+    rows = []
+    # Same single-pass walker as the extractors, so this tab doesn't
+    # re-derive the family/event nesting on its own
+    for _m_idx, _e_idx, event, _pre_text in _iter_legal_events(data):
+        if "@desc" not in event or "@code" not in event:
+            continue
+        pre = event.get("ops:pre") or event.get("pre")
+        details_text = clean_legal_text(pre) if pre else ""
+
+        # Look for Effective DATE specifically; the pattern guarantees
+        # eight digits, so slice straight into DD-MM-YYYY — the datetime
+        # constructor validates the fields without a strptime round trip
+        effective_date = "N/A"
+        m = _RE_EFFECTIVE.search(details_text)
+        if m:
+            d8 = m.group(1)
+            try:
+                datetime(int(d8[0:4]), int(d8[4:6]), int(d8[6:8]))
+                effective_date = f"{d8[6:8]}-{d8[4:6]}-{d8[0:4]}"
+            except ValueError:
+                pass
+
+        doc_date = format_date(event.get("@dateMigr") or event.get("@date") or "")
+        event_desc = event.get('@desc', '').title()  # Capitalize each word
+        event_code = event.get('@code', '').strip()
+
+        # One combined regex pass over the whole buffer, then split,
+        # instead of two subs per section
+        details = []
+        if details_text:
+            cleaned_full = _RE_LEGAL_CLEAN.sub('', details_text)
+            details = [s.strip() for s in cleaned_full.split(_BULLET_SEP) if s.strip()]
+
+        rows.append({
+            "label": f"{event_desc} ({event_code})",
+            "desc": event_desc,
+            "effective_date": effective_date,
+            "doc_date": doc_date,
+            "details": details,
+            "effect": (event.get("@infl", "") or "").strip(),
+        })
+    return rows
+
+
+def display_legal_events(data, estoppel_analyzer=None):
     try:
         st.markdown("#### Legal Events Timeline")
-        legal_data = data.get("legal", {}).get("ops:world-patent-data", {}).get("ops:patent-family", {})
-        
-        # Initialize estoppel analyzer with the data
-        estoppel_analyzer = ProsecutionHistoryEstoppel(data)
-        estoppel_analyzer.analyze_events()
-        
-        if "ops:family-member" in legal_data:
-            for member in legal_data["ops:family-member"]:
-                if "ops:legal" in member:
-                    events = member["ops:legal"]
-                    for event in events:
-                        if "@desc" in event and "@code" in event:
-                            # Get both effective and document dates
-                            pre = event.get("ops:pre") or event.get("pre")
-                            details_text = ""
-                            if pre:
-                                details_text = clean_legal_text(pre)
-
-                            # Look for Effective DATE specifically
-                            effective_date = "N/A"
-                            m = re.search(r'Effective\s+DATE\s+(\d{8})', details_text, re.IGNORECASE)
-                            if m:
-                                try:
-                                    dt = datetime.strptime(m.group(1), "%Y%m%d")
-                                    effective_date = dt.strftime("%d-%m-%Y")
-                                except:
-                                    pass
 
-                            # Get document date
-                            doc_date = format_date(event.get("@dateMigr") or event.get("@date") or "")
-                            
-                            # Create expandable section with clear date context
-                            event_desc = event.get('@desc', '').title()  # Capitalize each word
-                            event_code = event.get('@code', '').strip()
-                            
-                            with st.expander(f"{event_desc} ({event_code})"):
-                                if effective_date != "N/A":
-                                    st.write("**Effective Date:**", effective_date)
-                                if doc_date != "N/A" and doc_date != effective_date:
-                                    st.write("**Document Date:**", doc_date)
-                                
-                                # Show details with better formatting
-                                if details_text:
-                                    st.markdown("**Details:**")
-                                    sections = details_text.split('\n• ')
-                                    for section in sections:
-                                        if section.strip():
-                                            cleaned = re.sub(r'REFERENCE TO A NATIONAL CODE\s+', '', section)
-                                            cleaned = re.sub(r'Ref\s+', '', cleaned)
-                                            st.markdown(f"• {cleaned.strip()}")
-                                
-                                # Show effect if meaningful
-                                effect = event.get("@infl", "").strip()
-                                if effect and effect != "+":
-                                    st.write("**Effect:**", effect)
-                                
-                                # Show estoppel analysis if available
-                                if event_desc in estoppel_analyzer.estoppel_labels:
-                                    st.markdown("---")
-                                    st.markdown("**Estoppel Analysis:**")
-                                    st.markdown(estoppel_analyzer.estoppel_labels[event_desc])
+        # Reuse the analyzer from session state; only run the LLM-backed
+        # analysis if its labels haven't been computed yet
+        estoppel_analyzer = estoppel_analyzer or st.session_state.get("estoppel_analyzer") or ProsecutionHistoryEstoppel(data)
+        if not estoppel_analyzer.estoppel_labels:
+            estoppel_analyzer.analyze_events()
+
+        # Display strings are precomputed once per document at analyze time
+        rows = st.session_state.get("legal_display_rows")
+        if rows is None:
+            rows = _legal_display_rows(data)
+            st.session_state["legal_display_rows"] = rows
+
+        for row in rows:
+            with st.expander(row["label"]):
+                # Accumulate the whole expander body and emit a
+                # single markdown frame instead of one per field
+                parts = []
+                if row["effective_date"] != "N/A":
+                    parts.append(f"**Effective Date:** {row['effective_date']}")
+                if row["doc_date"] != "N/A" and row["doc_date"] != row["effective_date"]:
+                    parts.append(f"**Document Date:** {row['doc_date']}")
+
+                if row["details"]:
+                    parts.append("**Details:**")
+                    for section in row["details"]:
+                        parts.append(f"• {section}")
+
+                # Show effect if meaningful
+                if row["effect"] and row["effect"] != "+":
+                    parts.append(f"**Effect:** {row['effect']}")
+
+                # Show estoppel analysis if available
+                if row["desc"] in estoppel_analyzer.estoppel_labels:
+                    parts.append("---")
+                    parts.append("**Estoppel Analysis:**")
+                    parts.append(estoppel_analyzer.estoppel_labels[row["desc"]])
+
+                st.markdown("\n\n".join(parts))
 
         # Display Estoppel Analysis Results
         st.markdown("---")
@@ -788,14 +1165,15 @@ def display_family_data(data):
         
 def get_patent_details(data):
     """Extract key patent details from the data structure"""
-    biblio = data.get("bibliographic", {}).get("ops:world-patent-data", {}).get("exchange-documents", {}).get("exchange-document", [{}])[0]
-    
+    biblio = _dig(data, "bibliographic", "ops:world-patent-data", "exchange-documents", "exchange-document", 0, default={})
+    bib_data = biblio.get("bibliographic-data", {})
+
     return {
         "patent_number": f"{biblio.get('@country', '')}{biblio.get('@doc-number', '')}{biblio.get('@kind', '')}",
-        "title": biblio.get("invention-title", [{}])[0].get("#text", ""),
-        "assignee": "; ".join([a.get("applicant-name", {}).get("#text", "") for a in biblio.get("bibliographic-data", {}).get("applicants", [])]),
-        "inventors": "; ".join([i.get("inventor-name", {}).get("#text", "") for i in biblio.get("bibliographic-data", {}).get("inventors", [])]),
-        "filing_date": format_date(biblio.get("bibliographic-data", {}).get("application-reference", {}).get("document-id", [{}])[0].get("date")),
+        "title": _dig(biblio, "invention-title", 0, "#text", default=""),
+        "assignee": "; ".join(_dig(a, "applicant-name", "#text", default="") for a in bib_data.get("applicants", [])),
+        "inventors": "; ".join(_dig(i, "inventor-name", "#text", default="") for i in bib_data.get("inventors", [])),
+        "filing_date": format_date(_dig(bib_data, "application-reference", "document-id", 0, "date")),
         "publication_date": format_date(biblio.get("@date")),
         "legal_status": "Active" if not any("CEASED" in e.get("@desc", "").upper() for e in data.get("legal_events", []))
                         else "Ceased"
@@ -861,7 +1239,12 @@ def main():
         st.session_state["user"] = None
         st.session_state["user_id"] = None
         st.rerun()
-    
+
+    llm_timeout = float(st.sidebar.number_input(
+        "LLM timeout (s)", min_value=5, max_value=300, value=30,
+        help="Per-call cap for report LLM requests; calls that exceed it are retried."
+    ))
+
     st.markdown("### Enter Patent Publication Number")
 
     col1, col2 = st.columns([3, 1])
@@ -870,40 +1253,63 @@ def main():
     with col2:
         analyze_button = st.button("Analyze Patent", type="primary")
 
-    client = EPOClient()
-
     # If analyze clicked, fetch data and persist in session_state
     if analyze_button:
+        # new patent, new date strings — keep the memo cache bounded
+        _normalize_date_to_iso_cached.cache_clear()
         try:
             with st.spinner("Fetching patent data..."):
                 # Try the exact input first, then generated variants (deduped)
                 candidates = [patent_number] + generate_pub_variants(patent_number)
-                seen = set()
-                candidates = [c for c in candidates if c and (c not in seen and not seen.add(c))]
+                candidates = list(dict.fromkeys(c for c in candidates if c))
                 st.write("DEBUG: candidates to try:", candidates)
 
                 data = None
                 used_candidate = None
                 last_err = None
 
-                for cand in candidates:
-                    try:
-                        data = client.get_patent_data(cand)
-                        used_candidate = cand
+                # Probe the first batch of variants concurrently — each OPS
+                # attempt is a 300-800 ms network round trip, so trying them
+                # one by one dominated end-to-end fetch time
+                with ThreadPoolExecutor(max_workers=6) as ex:
+                    futs = {ex.submit(_fetch_patent, c): i for i, c in enumerate(candidates[:8])}
+                    best = None
+                    for f in as_completed(futs):
+                        idx = futs[f]
+                        try:
+                            result = f.result()
+                        except Exception as e:
+                            last_err = e
+                            st.write(f"DEBUG: candidate {candidates[idx]} failed: {repr(e)}")
+                            continue
+                        best = (idx, result)
                         break
-                    except Exception as e:
-                        last_err = e
-                        # DEBUG: surface exception and any HTTP body if available
+                    if best is not None:
+                        # Deterministic tie-break: if an earlier-ranked variant
+                        # finished in the same burst, prefer it over whichever
+                        # happened to complete first; cancel the rest
+                        for other, o_idx in futs.items():
+                            if o_idx < best[0] and other.done() and not other.cancelled():
+                                try:
+                                    best = (o_idx, other.result())
+                                except Exception:
+                                    pass
+                            elif not other.done():
+                                other.cancel()
+                        data = best[1]
+                        used_candidate = candidates[best[0]]
+
+                # Sequential fallback over the remaining tail variants
+                if data is None:
+                    for cand in candidates[8:]:
                         try:
+                            data = _fetch_patent(cand)
+                            used_candidate = cand
+                            break
+                        except Exception as e:
+                            last_err = e
                             st.write(f"DEBUG: candidate {cand} failed: {repr(e)}")
-                            # if EPOClient uses requests and attaches response
-                            if hasattr(e, 'response') and getattr(e, 'response') is not None:
-                                st.write("DEBUG: response status:", e.response.status_code)
-                                st.write("DEBUG: response body:", e.response.text)
-                        except Exception:
-                            st.write("DEBUG: error while logging exception:", repr(e))
-                        # continue to next candidate
-                        continue
+                            continue
 
                 if data is None:
                     tried_preview = ", ".join(candidates[:12])
@@ -920,18 +1326,25 @@ def main():
                 # Success: persist fetched data and derived objects in session_state
                 st.session_state["data"] = data
                 st.session_state["patent_number"] = used_candidate or patent_number
-                try:
-                    st.session_state["structured_data"] = extract_structured_data(data)
-                except Exception:
-                    # non-fatal: keep going if structured extraction fails
-                    st.session_state["structured_data"] = {}
-
-                # Precompute heavy/used objects once
+                # Precompute heavy/used objects once; the correlator is shared
+                # with the structured extraction below instead of being built twice
                 st.session_state["estoppel_analyzer"] = ProsecutionHistoryEstoppel(data)
                 pac = PriorArtCorrelator(data)
                 st.session_state["prior_art_correlator"] = pac
                 st.session_state["claims"] = ClaimsParser.extract_claims(data)
 
+                try:
+                    st.session_state["structured_data"] = extract_structured_data(data, pac)
+                except Exception:
+                    # non-fatal: keep going if structured extraction fails
+                    st.session_state["structured_data"] = {}
+                # keep the viz events from the same walk; tab6 and the report
+                # branch reuse them instead of re-walking the legal tree
+                st.session_state["events_for_viz"] = _dig(
+                    st.session_state["structured_data"], "dss", "events", default=[])
+                # display-ready legal-event rows for tab2; rebuilt per fetch
+                st.session_state["legal_display_rows"] = _legal_display_rows(data)
+
                 # Informational message (helps debug if different candidate was used)
                 if used_candidate and used_candidate != patent_number:
                     st.info(f"Fetched using variant: {used_candidate}")
@@ -945,6 +1358,8 @@ def main():
     if st.session_state.get("data"):
         data = st.session_state["data"]
         patent_number = st.session_state.get("patent_number", patent_number)
+        # shared stem for every artifact name derived from this patent
+        analysis_prefix = f"{patent_number}_analysis"
 
         tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
             "Bibliographic Data",
@@ -963,7 +1378,7 @@ def main():
 
         with tab2:
             try:
-                display_legal_events(data)
+                display_legal_events(data, st.session_state.get("estoppel_analyzer"))
             except Exception as e:
                 st.error(f"Legal events rendering failed: {e}")
 
@@ -972,10 +1387,10 @@ def main():
                 claims = st.session_state.get("claims", [])
                 st.markdown("#### Claims Extraction & Analysis")
                 st.write(f"Extracted {len(claims)} claim(s).")
-                analyzer = ClaimAnalyzer(openrouter_api_key=os.getenv("OPENROUTER_API_KEY"))
+                analyzer = _get_claim_analyzer()
                 if claims:
                     st.markdown("##### Summaries")
-                    summaries = analyzer.summarize_claims(claims, use_llm=True)
+                    summaries = analyzer.summarize_claims_batched(claims)
                     for s in summaries:
                         st.write(f"- Claim {s.get('id')}: {s.get('summary')}")
                 else:
@@ -985,7 +1400,7 @@ def main():
 
         with tab4:
             try:
-                display_prior_art(data)
+                display_prior_art(data, st.session_state.get("prior_art_correlator"))
             except Exception as e:
                 st.error(f"Prior art rendering failed: {e}")
 
@@ -996,10 +1411,22 @@ def main():
                 st.error(f"Family data rendering failed: {e}")
 
         with tab6:
+            # plotly and the report template stack are only needed by this
+            # tab; importing them lazily keeps first-page render off their
+            # (one-time) import cost for users who never open it
+            from visualization import build_event_timeline, build_claim_evolution
+            from reporting import render_shell, splice
+
             st.markdown("### Decision Support Reports")
 
             # Use extractor based on legal-status dates to guarantee valid dates
-            events_for_vis = extract_events_for_viz(data)
+            # an empty list is a valid (cached) answer — only a true miss
+            # falls back, and to the in-memory walk over the session data,
+            # never to a network-backed cache inside the render path
+            events_for_vis = st.session_state.get("events_for_viz")
+            if events_for_vis is None:
+                events_for_vis = extract_events_for_viz(data)
+                st.session_state["events_for_viz"] = events_for_vis
             if events_for_vis:
                 st.subheader("Patent Timeline")
                 try:
@@ -1044,18 +1471,36 @@ def main():
                     try:
                         with st.spinner("Analyzing patent data..."):
                             pac = st.session_state.get("prior_art_correlator") or PriorArtCorrelator(data)
+                            # Probe the correlator's capabilities once per click
+                            matcher = getattr(pac, "match_to_rejections", None)
+                            query = getattr(pac, "query_llm", None)
+                            streamer = getattr(pac, "stream_llm", None)
                             patent_details = get_patent_details(data)
                             
                             # Ensure extract is populated
                             extract = st.session_state.get("extract") or {}
                             if not isinstance(extract, dict):
                                 extract = {}
-                            extract["events"] = extract.get("events") or extract_events_for_viz(data) or []
+                            extract["events"] = extract.get("events") or st.session_state.get("events_for_viz") or extract_events_for_viz(data) or []
                             if "citations" not in extract:
                                 try:
-                                    raw_cits = pac.match_to_rejections() if pac and hasattr(pac, "match_to_rejections") else []
+                                    raw_cits = matcher() if matcher else []
                                 except Exception:
                                     raw_cits = []
+                                # The same citation can match several rejections;
+                                # keep one entry per (country, number, kind) — the
+                                # highest-confidence one — and surface the strongest
+                                # matches first so the prompt spends its budget on them
+                                def _conf_rank(rc):
+                                    return _CONFIDENCE_RANK.get(rc.get("confidence"), 0)
+                                best_by_key = {}
+                                for rc in raw_cits:
+                                    cit = rc.get("citation") or {}
+                                    key = (cit.get("country", ""), cit.get("number", ""), cit.get("kind", ""))
+                                    prev = best_by_key.get(key)
+                                    if prev is None or _conf_rank(rc) > _conf_rank(prev):
+                                        best_by_key[key] = rc
+                                raw_cits = sorted(best_by_key.values(), key=_conf_rank, reverse=True)
                                 simplified = []
                                 for i, rc in enumerate(raw_cits, 1):  # 1-indexed for tokens
                                     cit = rc.get("citation") or {}
@@ -1085,7 +1530,7 @@ def main():
 
                             # Ensure all dates in extract are ISO formatted
                             for event in extract.get("events", []):
-                                if event.get("date") and not re.match(r'^\d{4}-\d{2}-\d{2}$', event.get("date")):
+                                if event.get("date") and not _RE_ISO_DATE.match(event.get("date")):
                                     iso = normalize_date_to_iso(event.get("date"))
                                     if iso:
                                         event["date"] = iso
@@ -1101,133 +1546,188 @@ def main():
                                 extract_json_compact = extract_json_compact[:20000]
                             token_index_json = json.dumps(token_index, ensure_ascii=False, separators=(",", ":"), default=str)
 
-                            # Base prompts with token nudge appended
-                            prompts = {
-                                "executive_summary": """Executive Summary — Draft as a briefing for senior legal counsel on enforceability, litigation potential, monetization, key risks, and next steps.
-
-                            Write exactly 5 concise, expert bullets. Each bullet must:
-                            - State the fact or event clearly,
-                            - Explain its legal significance or impact (risk/opportunity),
-                            - Provide a practical next step (concrete and actionable),
-                            - End the sentence with exactly one evidence token (e.g., [EVT#1] or [CIT#1]).
-
-                            Examples:
-                            - "No opposition was filed post‑grant, reducing post‑grant risk in designated states. [EVT#3]"
-                            - "The patent lapsed in GB for non‑payment, suspending enforcement unless reinstated. [EVT#4]"
-                            - "The closest reference currently appears screening‑only pending claim mapping. [CIT#1]"
-                            - "Commission a targeted invalidity search focusing on the closest reference. [CIT#1]"
-
-                            Use only tokens from token_index. End every sentence with exactly one token.
-                            If no token applies, write "(Omitted pending source)".
-                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
-
-                                "timeline_analysis": """Timeline Analysis — Summarize the 5 most legally significant prosecution events and their impact on litigation.
-
-                            Write exactly 5 concise, professional bullets. Each bullet must:
-                            - Explain how the event affects enforceability, claim scope, or risk,
-                            - Give a concrete next step for counsel,
-                            - End the sentence with exactly one evidence token.
-
-                            Example:
-                            - "Intention to grant with no recorded opposition indicates an allowable claim set absent new art. [EVT#2]"
-
-                            Use only tokens from token_index. End every sentence with exactly one token.
-                            If no token applies, write "(Omitted pending source)".
-                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
-
-                                "prior_art_analysis": """Prior Art Analysis — Provide 5 concise, cited bullets on the most relevant references, covering risk type (novelty, obviousness, screening), likely claims affected, and next steps.
-
-                            Write exactly 5 bullets. Each bullet must:
-                            - Identify the citation and risk,
-                            - State which claim(s) are most likely affected (or say if mapping needed),
-                            - Recommend a concrete next step (mapping, expert review, targeted search),
-                            - End with exactly one token.
-
-                            Use only tokens from token_index. End every sentence with exactly one token.
-                            If no token applies, write "(Omitted pending source)".
-                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel".""",
-
-                                "recommendations": """Evidence‑Linked Recommendations — Provide exactly 3 specific, actionable next steps (evidence preservation, invalidity search, national status checks, licensing).
-
-                            Each recommendation must be one sentence and end with exactly one evidence token.
-
-                            Examples:
-                            - "Confirm reinstatement feasibility and current national status for the GB lapse event. [EVT#4]"
-                            - "Commission a focused invalidity search centered on the closest citation. [CIT#1]"
-                            - "Review designated states at the time of intention to grant to scope licensing opportunities. [EVT#2]"
-
-                            Use only tokens from token_index. End every sentence with exactly one token.
-                            If no token applies, write "(Omitted pending source)".
-                            Jurisdiction=EP: use "prosecution interpretation"; do not use "estoppel"."""
-                            }
+                            # Base prompts; templates are static and parsed once at import
+                            prompts = _PROMPT_TEMPLATES
 
-                            nudge = " Use only tokens from token_index below. End every sentence with exactly one token like [EVT#2] or [CIT#1]. If no token applies, write '(Omitted pending source)'. Jurisdiction=EP: use 'prosecution interpretation'; do not use 'estoppel'."
-                            
                             def _build_prompt_with_tokens(base: str, token_idx: dict, extract_dict: dict, **fmt):
-                                """Build prompt with human-readable token summary instead of raw JSON."""
-                                try:
-                                    p = base.format(**fmt)
-                                except Exception:
+                                """Build (system, user) prompt pair. The template and token rules are
+                                byte-stable across patents and go in the system prefix so provider
+                                prompt caching can serve them; the per-patent token reference is the
+                                user message."""
+                                # the shipped templates carry no replacement fields, so skip
+                                # str.format's per-field mini-language parse unless one appears
+                                if "{" in base:
+                                    try:
+                                        p = base.format(**fmt)
+                                    except Exception:
+                                        p = base
+                                else:
                                     p = base
-                                
-                                # Build human-readable token reference
-                                token_ref = "AVAILABLE TOKENS (use at end of every sentence):\n"
-                                for tok in sorted(token_idx.keys()):
-                                    meta = token_idx[tok]
-                                    if meta.get("type") == "event":
-                                        token_ref += f"  {tok}: {meta.get('date')} {meta.get('code')} ({','.join(meta.get('effects', ['unknown']))})\n"
-                                    elif meta.get("type") == "citation":
-                                        token_ref += f"  {tok}: {meta.get('id')} ({meta.get('kind')})\n"
-                                
-                                nudge = " Use ONLY tokens from AVAILABLE TOKENS above. End EVERY sentence with exactly one token like [EVT#2] or [CIT#1]. If no suitable token, write '(Omitted pending source)'. For EP jurisdiction: use 'prosecution interpretation', NEVER 'estoppel'."
-                                
-                                return p + "\n\n" + nudge + "\n\n" + token_ref
+
+                                # Build human-readable token reference; feed join a
+                                # generator so no intermediate list of lines (and no
+                                # quadratic += reallocation) is materialized. Event
+                                # tokens are capped to the significant + most recent
+                                # so the prompt doesn't balloon on long prosecutions.
+                                event_items = [(tok, meta) for tok, meta in sorted(token_idx.items()) if meta.get("type") == "event"]
+                                capped_events, truncated = _cap_events(event_items)
+                                def _token_lines():
+                                    for tok, meta in capped_events:
+                                        yield f"  {tok}: {meta.get('date')} {meta.get('code')} ({','.join(meta.get('effects', ['unknown']))})"
+                                    for tok, meta in sorted(token_idx.items()):
+                                        if meta.get("type") == "citation":
+                                            yield f"  {tok}: {meta.get('id')} ({meta.get('kind')})"
+                                token_ref = "AVAILABLE TOKENS (use at end of every sentence):\n" + "\n".join(_token_lines()) + "\n"
+                                if truncated:
+                                    token_ref += f"  (showing {len(capped_events)} of {len(event_items)} events)\n"
+
+                                nudge = " Use ONLY tokens from AVAILABLE TOKENS below. End EVERY sentence with exactly one token like [EVT#2] or [CIT#1]. If no suitable token, write '(Omitted pending source)'. For EP jurisdiction: use 'prosecution interpretation', NEVER 'estoppel'."
+
+                                return p + "\n\n" + nudge, token_ref
 
                             section_order = [("Executive Summary", "executive_summary"), ("Timeline Analysis", "timeline_analysis"), ("Prior Art Analysis", "prior_art_analysis"), ("Evidence-Linked Recommendations", "recommendations")]
                             analyses = {}
                             
                             def _sentences_to_bullets(text):
-                                sents = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+                                sents = [s.strip() for s in _RE_SENT_SPLIT.split(text.strip()) if s.strip()]
                                 bullets = []
                                 for s in sents:
-                                    if re.search(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', s):
+                                    if _RE_TOKEN.search(s):
                                         bullets.append(s)
                                 return bullets
 
+                            # Build all four prompts up front, then fire the LLM
+                            # calls concurrently: the sections are independent,
+                            # so wall time collapses from the sum of the four
+                            # call latencies to roughly the slowest one
+                            section_prompts = {
+                                key: _build_prompt_with_tokens(prompts.get(key, ""), token_index, extract, **patent_details)
+                                for _, key in section_order
+                            }
+                            llm_texts = {key: "" for key in section_prompts}
+                            llm_errors = {}
+
+                            # The report shell (header, coverage banner, event
+                            # cards, token scripts) does not depend on the LLM
+                            # output, so render it on a worker thread while the
+                            # completions run and splice the analyses in after
+                            generated_at = datetime.now().isoformat()
+                            shell_ex = ThreadPoolExecutor(max_workers=1)
+                            shell_future = shell_ex.submit(render_shell, {
+                                "patent_number": patent_number,
+                                "generated_at": generated_at,
+                                "events": extract.get("events", []),
+                                "coverage": coverage,
+                                "token_index": token_index
+                            })
+                            shell_ex.shutdown(wait=False)
+
+                            # Reuse answers from earlier clicks when a section's
+                            # exact prompt is unchanged (e.g. regenerating after
+                            # toggling an unrelated include checkbox)
+                            section_sigs = {}
+                            for key, (sys_p, user_p) in section_prompts.items():
+                                sig = hashlib.blake2b((sys_p + "\n" + user_p).encode("utf-8"), digest_size=16).hexdigest()
+                                section_sigs[key] = f"ana_{key}_{sig}"
+                                prev = st.session_state.get(section_sigs[key])
+                                if prev:
+                                    llm_texts[key] = prev
+
+                            if query and not all(llm_texts.values()):
+                                # First try a single combined round trip: one
+                                # completion covering all sections drops three
+                                # network/queue overheads versus four calls
+                                pending = {k: p for k, p in section_prompts.items() if not llm_texts[k]}
+                                try:
+                                    combined_system, combined_user = _build_combined_prompt(pending)
+                                    if streamer and hasattr(st, "write_stream"):
+                                        # stream so the user sees text after first-token
+                                        # latency; write_stream returns the joined result
+                                        # (added in streamlit 1.31 — older installs take
+                                        # the blocking call below)
+                                        with st.expander("Live analysis stream", expanded=False):
+                                            raw = st.write_stream(streamer(combined_user, system=combined_system)) or ""
+                                    else:
+                                        raw = _query_with_timeout(pac, combined_user, combined_system, timeout=llm_timeout) or ""
+                                    parsed = json.loads(_RE_CODE_FENCE.sub('', raw.strip()))
+                                    if isinstance(parsed, dict):
+                                        for key in pending:
+                                            val = parsed.get(key)
+                                            if isinstance(val, str) and val.strip():
+                                                llm_texts[key] = val
+                                except Exception:
+                                    pass
+
+                                # Fall back to concurrent per-section calls for
+                                # anything the combined reply didn't cover
+                                missing = {k: p for k, p in section_prompts.items() if not llm_texts[k]}
+                                if missing:
+                                    # One placeholder per pending section so each
+                                    # draft appears the moment its call finishes,
+                                    # instead of waiting for the slowest of the four
+                                    placeholders = {key: st.empty() for key in missing}
+
+                                    async def _gather_sections():
+                                        async def _one(key, prompt):
+                                            sys_p, user_p = prompt
+                                            for attempt in range(3):
+                                                try:
+                                                    text_out = await asyncio.wait_for(
+                                                        asyncio.to_thread(query, user_p, sys_p),
+                                                        timeout=llm_timeout
+                                                    )
+                                                    return key, text_out or "", None
+                                                except asyncio.TimeoutError:
+                                                    await asyncio.sleep(0.5 * 2 ** attempt)
+                                                except Exception as e:
+                                                    return key, "", str(e)
+                                            return key, "", f"timed out after 3 attempts of {llm_timeout:.0f}s"
+
+                                        out = []
+                                        tasks = [asyncio.ensure_future(_one(k, p)) for k, p in missing.items()]
+                                        for fut in asyncio.as_completed(tasks):
+                                            key, text_out, err = await fut
+                                            out.append((key, text_out, err))
+                                            if text_out:
+                                                placeholders[key].markdown(f"*Draft ready: {key}* ({len(text_out)} chars)")
+                                        return out
+
+                                    for key, text_out, err in asyncio.run(_gather_sections()):
+                                        llm_texts[key] = text_out
+                                        if err:
+                                            llm_errors[key] = err
+
+                                # remember successful answers for identical future clicks;
+                                # failure sentinels stay uncached so the next click retries
+                                for key, text_out in llm_texts.items():
+                                    if text_out and not _is_llm_failure(text_out):
+                                        st.session_state[section_sigs[key]] = text_out
+
                             for title, key in section_order:
-                                base = prompts.get(key, "")
-                                prompt = _build_prompt_with_tokens(base, token_index, extract, **patent_details)
+                                system_p, user_p = section_prompts[key]
 
                                 # DEBUG: show token index and prompt preview (first 2000 chars)
                                 st.write("DEBUG: token_index keys:", sorted(list(token_index.keys())))
                                 st.write("DEBUG: prompt preview (first 2000 chars):")
-                                st.text(prompt[:2000])
+                                st.text((system_p + "\n\n" + user_p)[:2000])
 
-                                llm_text = ""
-                                if pac and hasattr(pac, "query_llm"):
-                                    try:
-                                        llm_text = pac.query_llm(prompt) or ""
-                                    except Exception as e:
-                                        llm_text = ""
-                                        st.write(f"Debug: LLM call failed for {key}: {str(e)}")
+                                llm_text = llm_texts.get(key, "")
+                                if key in llm_errors:
+                                    st.write(f"Debug: LLM call failed for {key}: {llm_errors[key]}")
 
                                 # DEBUG: raw LLM output (trimmed)
                                 st.write(f"DEBUG: llm_text for {key} (first 4000 chars):")
                                 st.text((llm_text or "")[:4000])
 
-                                # Apply token guardrails and validations
-                                text = enforce_token_citations(llm_text or "", valid_tokens)
-                                text = validate_tokens(text, token_index)
-                                text = drop_uncited_sentences(text)
-                                text = sanitize_ep_language(text, jurisdiction="EP")
-                                text = remove_placeholders_and_normalize(text)  # NEW: Strip placeholders
+                                # Apply token guardrails and validations in one sentence walk
+                                text = _finalize_text(llm_text or "", valid_tokens)
 
                                 # Split into candidate sentences/bullets (must end with one token)
-                                cand_sents = [s for s in _split_sentences(text or "") if re.search(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]$', s)]
+                                cand_sents = [s for s in _split_sentences(text or "") if _RE_TOKEN_END.search(s)]
                                 # Keep only those that reference known tokens
                                 bullets = []
                                 for s in cand_sents:
-                                    toks = re.findall(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]$', s)
+                                    toks = _RE_TOKEN_END.findall(s)
                                     if toks and all(t in valid_tokens for t in toks):
                                         bullets.append(s)
 
@@ -1340,7 +1840,7 @@ def main():
                                         for line in top_lines:
                                             if not line or len(out) >= need:
                                                 continue
-                                            m = re.match(r'^(.*?) – (.*?) – (.*?) – \[(EVT#\d+)\]$', line)
+                                            m = _RE_TOP_EVENT_LINE.match(line)
                                             if m:
                                                 date, code, desc, tok_match = m.groups()
                                                 tok = safe_token(tok_match)
@@ -1399,13 +1899,13 @@ def main():
                                         for line in ranked:
                                             if not line or len(out) >= need:
                                                 continue
-                                            m = re.search(r'\[(CIT#\d+)\]$', line)
+                                            m = _RE_CIT_TOKEN_END.search(line)
                                             if m:
                                                 tok = m.group(1)
                                                 if safe_token(tok):
                                                     # Extract citation ID and risk from ranked line
-                                                    cid_m = re.match(r'^\d+\.\s+([^\s–]+)', line)
-                                                    risk_m = re.search(r'–\s+(novelty|obviousness|screening[^–]*)', line)
+                                                    cid_m = _RE_RANKED_CIT_ID.match(line)
+                                                    risk_m = _RE_RANKED_RISK.search(line)
                                                     cid = cid_m.group(1) if cid_m else "CIT:?"
                                                     risk = risk_m.group(1).strip() if risk_m else "screening"
                                                     
@@ -1489,7 +1989,7 @@ def main():
                                                     )
 
                                     # Ensure only valid-token-terminated, non-placeholder sentences returned
-                                    cleaned = [s.strip() for s in out if s.strip() and re.search(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]$', s.strip()) and "(Omitted" not in s]
+                                    cleaned = [s.strip() for s in out if s.strip() and _RE_TOKEN_END.search(s.strip()) and "(Omitted" not in s]
                                     return cleaned[:need]
 
                                 # Determine required per-section
@@ -1519,7 +2019,7 @@ def main():
                                     if "(Omitted" in ln or "[MISSING]" in ln or "[INVALID_" in ln:
                                         continue
                                     # require exactly one evidence token at end of sentence
-                                    toks = re.findall(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', ln)
+                                    toks = _RE_TOKEN.findall(ln)
                                     if not toks:
                                         continue
                                     # if more than one token, drop line (must be exactly one token)
@@ -1564,7 +2064,7 @@ def main():
                                         # ensure tokens in top3 are valid
                                         valid_top_lines = []
                                         for line in top3.split("\n"):
-                                            mt = re.search(r'\[(EVT#\d+)\]', line)
+                                            mt = _RE_EVT_TOKEN.search(line)
                                             if mt and mt.group(1) in token_index:
                                                 valid_top_lines.append(line)
                                         if valid_top_lines:
@@ -1582,7 +2082,7 @@ def main():
                                         # ensure only lines with valid tokens survive
                                         valid_ranked_lines = []
                                         for line in ranked.split("\n"):
-                                            mc = re.search(r'\[(CIT#\d+)\]', line)
+                                            mc = _RE_CIT_TOKEN.search(line)
                                             if mc and mc.group(1) in token_index:
                                                 valid_ranked_lines.append(line)
                                         if valid_ranked_lines:
@@ -1590,20 +2090,10 @@ def main():
 
                                 analyses[title] = section_html
 
-                            # Build context and render HTML
-                            context = {
-                                "patent_number": patent_number,
-                                "generated_at": datetime.now().isoformat(),
-                                "patent_details": patent_details,
-                                "analyses": analyses,
-                                "events": extract.get("events", []),
-                                "citations": extract.get("citations", []),
-                                "claims": extract.get("claims", []),
-                                "coverage": coverage,
-                                "token_index": token_index  # Pass for rendering
-                            }
-                            
-                            html = build_html_report(context)
+                            # Splice the analyses into the shell rendered
+                            # alongside the LLM calls
+                            shell_html, shell_slots = shell_future.result()
+                            html = splice(shell_html, analyses, shell_slots, token_index)
 
                             # Inject coverage header ONCE at the very top (after title but before sections)
                             coverage_line = (
@@ -1615,20 +2105,15 @@ def main():
                             )
 
                             # Insert after first <h1> tag, before any <h2>/<h3>
-                            import re as _re
-                            h1_match = _re.search(r'(</h1>)', html)
+                            h1_match = _RE_H1_CLOSE.search(html)
                             if h1_match:
                                 html = html[:h1_match.end()] + coverage_line + html[h1_match.end():]
 
                             # Ensure no duplicate coverage lines exist (dedup)
-                            html = _re.sub(
-                                r'<p[^>]*><strong>Coverage:</strong>.*?</p>(?:\s*<p[^>]*><strong>Coverage:</strong>.*?</p>)+',
-                                coverage_line,
-                                html
-                            )
+                            html = _RE_COVERAGE_DUP_STRONG.sub(coverage_line, html)
 
                             # Ensure no duplicate coverage lines exist
-                            html = _re.sub(r'<p[^>]*>Coverage:.*?</p>\s*<p[^>]*>Coverage:.*?</p>', coverage_line, html)
+                            html = _RE_COVERAGE_DUP.sub(coverage_line, html)
 
                             # Final checks
                             # Final checks — strict validation
@@ -1653,7 +2138,7 @@ def main():
                                 fails.append("Placeholder text remains in output.")
 
                             # Check 5: Coverage header present exactly once
-                            coverage_count = len(re.findall(r'<strong>Coverage:</strong>', html))
+                            coverage_count = html.count('<strong>Coverage:</strong>')
                             if coverage_count == 0:
                                 fails.append("Coverage header missing (should appear exactly once below title).")
                             elif coverage_count > 1:
@@ -1675,15 +2160,14 @@ def main():
                                         fails.append(f"'Ranked Citations' header missing ({cit_count} citations exist).")
 
                             # Check 8: All tokens used must be valid (in token_index)
-                            invalid_tokens = re.findall(r'\[(EVT#\d+|CIT#\d+|CLM#\d+|DSG#\d+)\]', html)
+                            invalid_tokens = _RE_TOKEN.findall(html)
                             for tok in set(invalid_tokens):
                                 if tok not in token_index:
                                     fails.append(f"Token {tok} used but not present in token_index.")
 
                             # Check 9: No duplicate section headers
-                            section_headers = ["Executive Summary", "Timeline Analysis", "Prior Art Analysis", "Evidence-Linked Recommendations"]
-                            for header in section_headers:
-                                header_count = len(re.findall(rf'<h2[^>]*>{re.escape(header)}</h2>', html))
+                            for header, header_re in _RE_H2_HEADERS.items():
+                                header_count = len(header_re.findall(html))
                                 if header_count > 1:
                                     fails.append(f"Section '{header}' appears {header_count} times (should be 1).")
 
@@ -1700,22 +2184,53 @@ def main():
                             else:
                                 st.success("✅ All quality checks passed. Report is production-ready.")
 
-                            # Save and download
-                            out_path = os.path.join(os.getcwd(), f"{patent_number}_analysis.html")
-                            with open(out_path, "w", encoding="utf-8") as f:
-                                f.write(html)
-                            with open(out_path, "rb") as f:
-                                st.download_button("Download Analysis Report", f, file_name=f"{patent_number}_analysis.html", mime="text/html")
+                            # Serve the report straight from memory; the old
+                            # write-then-reread round-tripped the whole file
+                            # through disk just to hand bytes to the button.
+                            # Stash the bytes in the session so the download
+                            # button survives later reruns without regenerating
+                            html_bytes = html.encode("utf-8")
+                            st.session_state.setdefault("_reports", {})[patent_number] = html_bytes
+
+                            # Persist the copy in the background off the render path;
+                            # write to a temp name and swap so a concurrent reader
+                            # never sees a half-written report
+                            out_path = os.path.join(os.getcwd(), f"{analysis_prefix}.html")
+                            def _persist(path=out_path, payload=html_bytes):
+                                try:
+                                    tmp = path + ".tmp"
+                                    with open(tmp, "wb", buffering=65536) as f:
+                                        f.write(payload)
+                                    os.replace(tmp, path)
+                                except OSError:
+                                    pass
+                            threading.Thread(target=_persist, daemon=True).start()
 
                     except Exception as e:
                         st.error(f"Report generation failed: {str(e)}")
-        # Offer full JSON download (persisted)
-        st.download_button(
-            label="Download Full Data",
-            data=json.dumps(data, indent=2),
-            file_name=f"{patent_number}_analysis.json",
-            mime="application/json"
-        )
+
+                # Offer the last generated report on every rerun, not just the
+                # one that ran the generation
+                report_bytes = st.session_state.get("_reports", {}).get(patent_number)
+                if report_bytes is not None:
+                    st.download_button("Download Analysis Report", data=report_bytes, file_name=f"{analysis_prefix}.html", mime="text/html")
+        # Offer full JSON download (persisted); serialized once per patent
+        # and cached, not per rerun
+        dl_col1, dl_col2 = st.columns(2)
+        with dl_col1:
+            st.download_button(
+                label="Download Full Data",
+                data=_full_data_json(patent_number, data),
+                file_name=f"{analysis_prefix}.json",
+                mime="application/json"
+            )
+        with dl_col2:
+            st.download_button(
+                label="Download Full Data (gzip)",
+                data=_full_data_json_gz(patent_number, data),
+                file_name=f"{analysis_prefix}.json.gz",
+                mime="application/gzip"
+            )
 
     else:
         st.info("Enter a patent number and click 'Analyze Patent' to begin.")
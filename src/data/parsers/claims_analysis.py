@@ -1,6 +1,7 @@
 from typing import List, Dict, Optional
 from difflib import SequenceMatcher
 import os
+import re
 import logging
 
 # attempt to import your OpenRouter client. If missing, analysis will use local heuristics.
@@ -11,6 +12,9 @@ except Exception:
 
 LOG = logging.getLogger("claim_analyzer")
 
+# "Claim <id>: <summary>" reply lines from summarize_claims_batched
+_RE_CLAIM_LINE = re.compile(r'^Claim\s+(\S+?):\s*(.+)$', re.MULTILINE)
+
 def _simple_diff(a: str, b: str) -> Dict:
     """Return basic diff info: additions, removals using SequenceMatcher."""
     s = SequenceMatcher(None, a, b)
@@ -109,6 +113,41 @@ class ClaimAnalyzer:
             out.append({"id": c.get("id"), "text": text, "summary": summary})
         return out
 
+    def summarize_claims_batched(self, claims: List[Dict], batch_size: int = 10) -> List[Dict]:
+        """
+        Like summarize_claims but caps each LLM request at batch_size claims and
+        uses a line-per-claim reply format parsed with a precompiled regex, so one
+        round trip covers up to batch_size claims and a malformed reply degrades
+        per batch rather than per run. Falls back to the heuristic summary for
+        any claim the LLM did not answer.
+        """
+        if not (self.client and claims):
+            return self.summarize_claims(claims, use_llm=False)
+
+        summaries_by_id = {}
+        for start in range(0, len(claims), batch_size):
+            batch = claims[start:start + batch_size]
+            joined = "\n\n".join(f"Claim {c.get('id')}: {c.get('text', '')}" for c in batch)
+            prompt = (
+                "You are a concise patent analyst. For each claim below, produce a one-sentence "
+                "summary of the technical scope in plain English. Reply with exactly one line per "
+                "claim in the form 'Claim <id>: <summary>' and nothing else.\n\n"
+                f"{joined}"
+            )
+            resp = self._call_llm(prompt)
+            if resp:
+                for cid, summ in _RE_CLAIM_LINE.findall(resp):
+                    summaries_by_id[cid.strip()] = summ.strip()
+
+        out = []
+        for c in claims:
+            text = c.get("text", "") or ""
+            summary = summaries_by_id.get(str(c.get("id")))
+            if summary is None:
+                summary = (text[:200] + "...") if len(text) > 200 else text
+            out.append({"id": c.get("id"), "text": text, "summary": summary})
+        return out
+
     def compare_claim_sets(self, base: List[Dict], amended: List[Dict]) -> List[Dict]:
         """
         Pairwise compare claims from two sets by id (or position when id missing).
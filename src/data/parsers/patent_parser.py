@@ -8,6 +8,21 @@ def _ensure_list(x):
         return []
     return x if isinstance(x, list) else [x]
 
+def _dmy_from_ymd(y: int, mo: int, d: int, now_year: int):
+    """Format (y, mo, d) as DD-MM-YYYY, or None when invalid/out of range.
+    The C-level datetime constructor validates the fields without strptime's
+    per-call format parsing."""
+    if not (1900 <= y <= now_year + 1):
+        return None
+    try:
+        return datetime(y, mo, d).strftime("%d-%m-%Y")
+    except ValueError:
+        return None
+
+def _dmy_from_ymd8(d8: str, now_year: int):
+    """DD-MM-YYYY from an 8-digit YYYYMMDD token, or None."""
+    return _dmy_from_ymd(int(d8[0:4]), int(d8[4:6]), int(d8[6:8]), now_year)
+
 class PatentDataParser:
     @staticmethod
     def extract_date_from_text(text: str) -> str:
@@ -23,58 +38,46 @@ class PatentDataParser:
         s = str(text).strip()
         now_year = datetime.now().year
 
-        # 1) Strict strptime patterns for common labeled forms
-        for fmt in ("DATE %Y%m%d", "Effective DATE %Y%m%d"):
+        # 1) Strict patterns for common labeled forms
+        for label in ("DATE", "Effective"):
             try:
-                # try to parse when the format appears in the string
-                if re.search(r'\b' + fmt.split()[0], s, flags=re.IGNORECASE):
+                # try to parse when the label appears in the string
+                if re.search(r'\b' + label, s, flags=re.IGNORECASE):
                     # extract trailing 8-digit token if present
                     m = re.search(r'(\d{8})', s)
                     if m:
-                        dt = datetime.strptime(m.group(1), "%Y%m%d")
-                        if 1900 <= dt.year <= now_year + 1:
-                            return dt.strftime("%d-%m-%Y")
+                        out = _dmy_from_ymd8(m.group(1), now_year)
+                        if out:
+                            return out
             except Exception:
                 pass
 
-        # 2) Direct strptime when entire string equals YYYYMMDD
+        # 2) Direct parse when entire string equals YYYYMMDD
         if s.isdigit() and len(s) == 8:
-            try:
-                dt = datetime.strptime(s, "%Y%m%d")
-                if 1900 <= dt.year <= now_year + 1:
-                    return dt.strftime("%d-%m-%Y")
-            except Exception:
-                pass
+            out = _dmy_from_ymd8(s, now_year)
+            if out:
+                return out
 
         # 3) Regex lookups for common tokens
         m = re.search(r'\b(\d{8})\b', s)
         if m:
-            try:
-                dt = datetime.strptime(m.group(1), "%Y%m%d")
-                if 1900 <= dt.year <= now_year + 1:
-                    return dt.strftime("%d-%m-%Y")
-            except Exception:
-                pass
+            out = _dmy_from_ymd8(m.group(1), now_year)
+            if out:
+                return out
 
         # 4) YYYY[-/.]MM[-/.]DD
         m = re.search(r'\b(\d{4})[\/\-\.\s](\d{2})[\/\-\.\s](\d{2})\b', s)
         if m:
-            try:
-                dt = datetime.strptime(f"{m.group(1)}{m.group(2)}{m.group(3)}", "%Y%m%d")
-                if 1900 <= dt.year <= now_year + 1:
-                    return dt.strftime("%d-%m-%Y")
-            except Exception:
-                pass
+            out = _dmy_from_ymd(int(m.group(1)), int(m.group(2)), int(m.group(3)), now_year)
+            if out:
+                return out
 
         # 5) DD[-/.]MM[-/.]YYYY
         m = re.search(r'\b(\d{2})[\/\-\.\s](\d{2})[\/\-\.\s](\d{4})\b', s)
         if m:
-            try:
-                dt = datetime.strptime(f"{m.group(3)}{m.group(2)}{m.group(1)}", "%Y%m%d")
-                if 1900 <= dt.year <= now_year + 1:
-                    return dt.strftime("%d-%m-%Y")
-            except Exception:
-                pass
+            out = _dmy_from_ymd(int(m.group(3)), int(m.group(2)), int(m.group(1)), now_year)
+            if out:
+                return out
 
         return "N/A"
 
@@ -1,27 +1,108 @@
 import re
 import os
-import json
+import hashlib
+import time
+import orjson
 import requests
 from typing import List, Dict
 from datetime import datetime
+from difflib import SequenceMatcher
+
+# Content-addressed on-disk cache for LLM answers. Streamlit reruns the whole
+# script per widget interaction, so identical prompts recur constantly; a hit
+# costs one small file read instead of an API round trip.
+_LLM_CACHE_DIR = os.path.join(os.getcwd(), ".llm_cache")
+_LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))
+
+
+class SemanticAnswerCache:
+    """Near-duplicate answer cache in front of the exact-hash LLM cache.
+
+    Prompts for patents in the same family or with the same assignee often
+    differ by only a few facts, which an exact hash always misses. This keeps
+    the last few hundred (prompt, response) pairs and reuses an answer when a
+    new prompt is nearly identical, using difflib ratios (already the diff
+    machinery used elsewhere in this repo) rather than an embedding model.
+    """
+
+    def __init__(self, path: str = None, threshold: float = 0.95, max_entries: int = 1000):
+        self.path = path or os.path.join(_LLM_CACHE_DIR, "semantic_cache.json")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        try:
+            with open(self.path, "rb") as f:
+                self.rows = orjson.loads(f.read())
+        except Exception:
+            self.rows = []
+
+    def get(self, prompt: str):
+        best = 0.0
+        best_row = None
+        # seq2 is fixed so SequenceMatcher reuses its index across rows
+        matcher = SequenceMatcher(None, "", prompt)
+        for row in self.rows:
+            matcher.set_seq1(row.get("prompt", ""))
+            # cheap upper bounds first; most rows never pay the full diff
+            if matcher.real_quick_ratio() < self.threshold:
+                continue
+            if matcher.quick_ratio() < self.threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= self.threshold and ratio > best:
+                best = ratio
+                best_row = row
+        if best_row is not None:
+            best_row["hits"] = best_row.get("hits", 0) + 1
+            best_row["ts"] = int(time.time())
+            return best_row.get("response")
+        return None
+
+    def put(self, prompt: str, response: str):
+        self.rows.append({"prompt": prompt, "response": response, "ts": int(time.time()), "hits": 0})
+        if len(self.rows) > self.max_entries:
+            # evict least-recently-used entries (ts is bumped on every hit)
+            self.rows.sort(key=lambda r: r.get("ts", 0))
+            self.rows = self.rows[-self.max_entries:]
+        try:
+            os.makedirs(_LLM_CACHE_DIR, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(orjson.dumps(self.rows))
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+_SEMANTIC_CACHE = None
+
+def _get_semantic_cache() -> SemanticAnswerCache:
+    global _SEMANTIC_CACHE
+    if _SEMANTIC_CACHE is None:
+        _SEMANTIC_CACHE = SemanticAnswerCache()
+    return _SEMANTIC_CACHE
 
 class PriorArtCorrelator:
     def __init__(self, patent_data: Dict, cache_path: str = None):
         self.data = patent_data
         self.cache_path = cache_path or os.path.join(os.getcwd(), "prior_art_cache.json")
         self.cache = self._load_cache()
+        # memoized match_to_rejections result; self.data never changes after
+        # construction, so the O(citations × events) matching runs once
+        self._match_results = None
 
     def _load_cache(self):
+        # orjson parses the cache bytes several times faster than stdlib json;
+        # this runs on every instantiation, i.e. every Streamlit rerun
         try:
-            with open(self.cache_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(self.cache_path, "rb") as f:
+                return orjson.loads(f.read())
         except Exception:
             return {}
 
     def _save_cache(self):
         try:
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, indent=2)
+            with open(self.cache_path, "wb") as f:
+                f.write(orjson.dumps(self.cache, option=orjson.OPT_INDENT_2))
         except Exception:
             pass
 
@@ -83,6 +164,8 @@ class PriorArtCorrelator:
         Map extracted/normalized citations to legal events indicating rejections/references.
         Returns list of mappings: {citation, matched_events: [...], confidence}
         """
+        if self._match_results is not None:
+            return self._match_results
         citations = self.extract_citations()
         results = []
         # Use a set to track unique citations
@@ -102,7 +185,16 @@ class PriorArtCorrelator:
                     text = " ".join([ (p.get("#text") if isinstance(p, dict) else str(p)) for p in pre ])
                 elif isinstance(pre, str):
                     text = pre
-                legal_events.append({"code": ev.get("@code"), "desc": desc, "text": f"{desc} {text}", "raw": ev})
+                full = f"{desc} {text}"
+                legal_events.append({
+                    "code": ev.get("@code"),
+                    "desc": desc,
+                    "text": full,
+                    # materialize the display preview once here instead of
+                    # re-slicing on every Streamlit rerun of the citation tab
+                    "text_preview": (full[:200] + "...") if len(full) > 200 else full,
+                    "raw": ev
+                })
         
         for c in citations:
             norm = self.normalize_citation(c["raw"])
@@ -130,15 +222,64 @@ class PriorArtCorrelator:
         self.cache_key = "prior_art_results"
         self.cache[self.cache_key] = results
         self._save_cache()
+        self._match_results = results
         return results
     
     
 
-    def query_llm(self, text: str) -> str:
+    @staticmethod
+    def _llm_cache_path(model: str, prompt: str) -> str:
+        key = hashlib.blake2b((model + prompt).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(_LLM_CACHE_DIR, key + ".txt")
+
+    @staticmethod
+    def _llm_cache_get(path: str):
+        try:
+            if time.time() - os.path.getmtime(path) <= _LLM_CACHE_TTL:
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read()
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def _llm_cache_put(path: str, response: str):
+        try:
+            os.makedirs(_LLM_CACHE_DIR, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(response)
+            os.replace(tmp, path)  # atomic so concurrent reruns never see partial files
+        except OSError:
+            pass
+
+    _DEFAULT_SYSTEM = "You are a senior IP strategist and patent analyst at a top law firm. Provide detailed, actionable analysis with specific examples and business-focused insights."
+
+    def query_llm(self, text: str, system: str = None) -> str:
+        """Run a completion. `system` overrides the default system prompt; it is
+        sent with a cache_control breakpoint so providers can serve the static
+        instruction prefix from their prompt cache, with only `text` varying
+        per patent."""
         api_key = os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             return "LLM analysis not available - API key not found"
-        
+
+        model = "mistralai/mistral-7b-instruct"
+        system = system or self._DEFAULT_SYSTEM
+        cache_path = self._llm_cache_path(model, system + "\n" + text)
+        cached = self._llm_cache_get(cache_path)
+        if cached is not None:
+            return cached
+
+        # mirror the exact-cache key: the report sections share one user
+        # message and differ only in `system`, so matching on `text` alone
+        # would serve one section's answer for another
+        semantic = _get_semantic_cache()
+        semantic_key = system + "\n" + text
+        near = semantic.get(semantic_key)
+        if near is not None:
+            return near
+
         url = "https://openrouter.ai/api/v1/chat/completions"   # Correct URL
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -147,11 +288,13 @@ class PriorArtCorrelator:
         }
         
         payload = {
-            "model": "mistralai/mistral-7b-instruct",
+            "model": model,
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are a senior IP strategist and patent analyst at a top law firm. Provide detailed, actionable analysis with specific examples and business-focused insights."
+                    "content": [
+                        {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+                    ]
                 },
                 {
                     "role": "user",
@@ -167,13 +310,90 @@ class PriorArtCorrelator:
             
             response = session.post(url, headers=headers, json=payload, timeout=(5, 30))
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            content = response.json()["choices"][0]["message"]["content"]
+            # only successful completions are cached; failure strings below
+            # must never be served for the next 24 hours
+            self._llm_cache_put(cache_path, content)
+            semantic.put(semantic_key, content)
+            return content
         except Exception as e:
             return f"Analysis failed: {str(e)}"
         finally:
             session.close()
 
 
+    def stream_llm(self, text: str, system: str = None):
+        """Streaming counterpart of query_llm: yields completion chunks as they
+        arrive so the UI can show text after first-token latency instead of
+        blocking on the full response. The joined result is written to the same
+        caches, and cache hits are yielded whole."""
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            yield "LLM analysis not available - API key not found"
+            return
+
+        model = "mistralai/mistral-7b-instruct"
+        system = system or self._DEFAULT_SYSTEM
+        cache_path = self._llm_cache_path(model, system + "\n" + text)
+        cached = self._llm_cache_get(cache_path)
+        if cached is not None:
+            yield cached
+            return
+
+        # mirror the exact-cache key, as in query_llm
+        semantic = _get_semantic_cache()
+        semantic_key = system + "\n" + text
+        near = semantic.get(semantic_key)
+        if near is not None:
+            yield near
+            return
+
+        url = "https://openrouter.ai/api/v1/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:8501"
+        }
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": [
+                        {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+                    ]
+                },
+                {"role": "user", "content": text}
+            ],
+            "stream": True
+        }
+
+        session = requests.Session()
+        try:
+            adapter = requests.adapters.HTTPAdapter(max_retries=3)
+            session.mount('https://', adapter)
+            response = session.post(url, headers=headers, json=payload, timeout=(5, 30), stream=True)
+            response.raise_for_status()
+            chunks = []
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data.strip() == "[DONE]":
+                    break
+                delta = orjson.loads(data)["choices"][0].get("delta", {}).get("content", "")
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+            content = "".join(chunks)
+            if content:
+                self._llm_cache_put(cache_path, content)
+                semantic.put(semantic_key, content)
+        except Exception as e:
+            yield f"Analysis failed: {str(e)}"
+        finally:
+            session.close()
+
     def _gather_events_for_viz(self) -> List[Dict]:
         """Format legal events for visualization"""
         events = []
@@ -206,8 +426,9 @@ class PriorArtCorrelator:
                             if date_str:
                                 try:
                                     # Handle different date formats
-                                    if len(date_str) == 8:  # YYYYMMDD
-                                        date = datetime.strptime(date_str, "%Y%m%d")
+                                    if len(date_str) == 8:  # YYYYMMDD — fixed
+                                        # layout, so skip strptime's format parse
+                                        date = datetime(int(date_str[0:4]), int(date_str[4:6]), int(date_str[6:8]))
                                     else:  # Try ISO format
                                         date = datetime.fromisoformat(date_str)
                                     
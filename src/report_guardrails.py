@@ -39,6 +39,25 @@ def sanitize_ep_language(text: str, jurisdiction: str = "EP") -> str:
         text = re.sub(r'\bestoppel\b', 'prosecution interpretation', text, flags=re.IGNORECASE)
     return text
 
+def finalize_json_text(text: str, jurisdiction: str = "EP") -> str:
+    """
+    One-pass equivalent of enforce_json_citations -> drop_uncited_sentences
+    -> sanitize_ep_language: split into sentences once, keep sentences that
+    carry a [JSON:/ citation (or no letters at all), apply the EP wording
+    rule, and join once.
+    """
+    if not text:
+        return text
+    ep = bool(jurisdiction) and jurisdiction.upper() == "EP"
+    out = []
+    for s in re.split(r'(?<=[\.!?])\s+', text.strip()):
+        if re.search(r'[A-Za-z]', s) and '[JSON:/' not in s:
+            continue
+        if ep:
+            s = re.sub(r'\bestoppel\b', 'prosecution interpretation', s, flags=re.IGNORECASE)
+        out.append(s)
+    return " ".join(out)
+
 def inject_coverage_header(html: str, coverage: Dict) -> str:
     """
     Prepend a coverage line inside <body> or at top if <body> missing.
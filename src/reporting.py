@@ -261,48 +261,86 @@ REPORT_HTML_TEMPLATE = """
 """
 
 
-def build_html_report(context):
+# Section titles the report template expects, in document order
+_SECTION_TITLES = (
+    "Executive Summary",
+    "Timeline Analysis",
+    "Prior Art Analysis",
+    "Evidence-Linked Recommendations",
+)
+
+
+def render_shell(context):
     """
-    Build HTML report with token-to-path deep-linking support.
-    Receives context dict with:
-    - patent_number, generated_at, patent_details
-    - analyses (dict keyed by section title)
-    - events, citations, claims, coverage
-    - token_index (dict of token->metadata)
+    Render everything in the report that does not depend on the LLM analyses:
+    header, coverage banner, event cards, token deep-linking and scripts.
+    Each analysis slot is filled with a unique placeholder string so the shell
+    can be built concurrently with the LLM calls and the finished analyses
+    spliced in afterwards.
+    Returns (shell_html, {section_title: placeholder}).
     """
-    # Extract context values
     patent_number = context.get("patent_number", "UNKNOWN")
     generated_at = context.get("generated_at", "")
-    analyses = context.get("analyses", {})
     events = context.get("events", [])
     coverage = context.get("coverage", {})
     token_index = context.get("token_index", {})
-    
-    # Render template
+
+    placeholders = {title: f"%%ANALYSIS_SLOT_{i}%%" for i, title in enumerate(_SECTION_TITLES)}
+
+    # Render template with placeholders standing in for the analyses
     template = Template(REPORT_HTML_TEMPLATE)
-    html_output = template.render(
+    shell_html = template.render(
         patent_number=patent_number,
         generated_at=generated_at,
-        analyses=analyses,
+        analyses=placeholders,
         events=events,
         coverage=coverage
     )
-    
+
     # Apply token deep-linking (convert [EVT#1] to clickable spans)
-    html_output = render_token_links(html_output, token_index)
-    
+    shell_html = render_token_links(shell_html, token_index)
+
     # Add JavaScript handler for token clicks
-    html_output = add_token_click_handler(html_output)
-    
+    shell_html = add_token_click_handler(shell_html)
+
     # Inject hidden token-index data block for reference
     token_data_script = (
         "<script type='application/json' id='token-index'>\n"
         + json.dumps(token_index, indent=2)
         + "\n</script>\n"
     )
-    html_output = html_output.replace("</body>", token_data_script + "</body>")
-    
-    return html_output
+    shell_html = shell_html.replace("</body>", token_data_script + "</body>")
+
+    return shell_html, placeholders
+
+
+def splice(shell_html, analyses, placeholders, token_index=None):
+    """
+    Fill the analysis slots of a rendered shell: one str.replace per section.
+    Token links inside the analyses are resolved here because the shell pass
+    could not see them.
+    """
+    for title, slot in placeholders.items():
+        body = analyses.get(title) or ""
+        if not body and title == "Evidence-Linked Recommendations":
+            body = "No recommendations available."
+        if token_index:
+            body = render_token_links(body, token_index)
+        shell_html = shell_html.replace(slot, body, 1)
+    return shell_html
+
+
+def build_html_report(context):
+    """
+    Build HTML report with token-to-path deep-linking support.
+    Receives context dict with:
+    - patent_number, generated_at, patent_details
+    - analyses (dict keyed by section title)
+    - events, citations, claims, coverage
+    - token_index (dict of token->metadata)
+    """
+    shell_html, placeholders = render_shell(context)
+    return splice(shell_html, context.get("analyses", {}), placeholders, context.get("token_index", {}))
 
 
 def render_top_pivotal_events(events: list) -> str: